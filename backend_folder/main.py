@@ -1,6 +1,13 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from .routers import insurance, nlp, chat, llm
+from .services.assistant_service import assistant_service
+from .services.ocr_service import ocr_executor
+from data_ingestion.module.cms_ingestion.chunk_store import get_cms_chunk_store
+from module.openfda_client import close_openfda_client
+from module import ins_llm_loader
 import os
 
 from dotenv import load_dotenv
@@ -11,10 +18,30 @@ OPEN_AI_KEY = os.getenv("OPEN_AI_KEY")
 if not OPEN_AI_KEY:
     raise ValueError("Missing OPEN_AI_KEY environment variable")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Start the CMS background refresh so the first queries find chunks sooner
+    cms_store = get_cms_chunk_store()
+    # Spawn OCR workers up front so the first upload does not pay for it
+    ocr_executor.start()
+    # Build the shared assistant (vector DB + indexed catalog) once per worker
+    await run_in_threadpool(assistant_service.start)
+    # The chat vector DB and CMS provider data are otherwise created on first use;
+    # LLM_LOADER_EAGER_INIT=1 trades startup time (a CMS download) for a fast first query
+    if os.getenv("LLM_LOADER_EAGER_INIT", "0") == "1":
+        await run_in_threadpool(ins_llm_loader.warm_up)
+    app.state.assistant_service = assistant_service
+    yield
+    assistant_service.shutdown()
+    cms_store.stop(timeout=1.0)
+    close_openfda_client()
+    ocr_executor.shutdown()
+
 app = FastAPI(
     title="Healthcare AI Assistant Backend",
     description="API backend for insurance analysis and cost comparison",
-    version="1.0"
+    version="1.0",
+    lifespan=lifespan
 )
 
 @app.head("/health", include_in_schema=False)
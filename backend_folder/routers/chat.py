@@ -2,7 +2,7 @@ from fastapi import APIRouter, Request
 from pydantic import BaseModel
 from typing import Optional
 import pandas as pd
-from module.ins_llm_loader import handle_chat_query, load_insurance_data
+from module.ins_llm_loader import handle_chat_query, insurance_data_cache
 
 router = APIRouter()
 
@@ -23,12 +23,12 @@ class ChatResponse(BaseModel):
 # Load insurance data once (customize path as needed)
 INSURANCE_PATH = "data/insurance.csv"
 try:
-    df, docs = load_insurance_data(INSURANCE_PATH)
+    dataset = insurance_data_cache.get(INSURANCE_PATH)
 except Exception:
-    df, docs = None, None
+    dataset = None
 
 
 @router.post("/chat", response_model=ChatResponse)
 async def chat_endpoint(request: ChatRequest):
-    result = handle_chat_query(request.query, df, docs)
+    result = handle_chat_query(request.query, dataset=dataset)
     return ChatResponse(**result)
@@ -1,17 +1,77 @@
-from fastapi import APIRouter, UploadFile, File
-from ..services.ocr_service import extract_insurance_info
+import asyncio
+import json
+import os
+from typing import List
+
+from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi.responses import StreamingResponse
+from ..services.ocr_service import extract_insurance_info_async, OCRSaturatedError, ocr_cache, ocr_executor
 
 router = APIRouter()
 
+BATCH_MAX_FILES = int(os.getenv("OCR_BATCH_MAX_FILES", "64"))
+
+async def _run_ocr(contents: bytes) -> dict:
+    try:
+        return await extract_insurance_info_async(contents)
+    except OCRSaturatedError:
+        raise HTTPException(status_code=503, detail="OCR service is busy, please retry shortly",
+                            headers={"Retry-After": "1"})
+
 @router.post("/upload")
 async def upload_insurance(file: UploadFile = File(...)):
     contents = await file.read()
-    result = extract_insurance_info(contents)
+    result = await _run_ocr(contents)
     return {"extracted_data": result}
 
 @router.post("/analyze")
 async def analyze_insurance(file: UploadFile = File(...)):
     contents = await file.read()
-    result = extract_insurance_info(contents)
+    result = await _run_ocr(contents)
     # result is {"fields": ..., "summary": ...}
-    return {"analysis": result["fields"], "summary": result["summary"]}
\ No newline at end of file
+    return {"analysis": result["fields"], "summary": result["summary"]}
+
+async def _analyze_item(index: int, filename: str, contents: bytes, limit: asyncio.Semaphore) -> dict:
+    item = {"index": index, "filename": filename}
+    async with limit:
+        try:
+            result = await extract_insurance_info_async(contents)
+        except OCRSaturatedError:
+            item["error"] = "OCR service is busy, please retry this file"
+        except Exception as e:
+            item["error"] = str(e) or type(e).__name__
+        else:
+            item["analysis"] = result["fields"]
+            item["summary"] = result["summary"]
+    return item
+
+@router.post("/analyze_batch")
+async def analyze_insurance_batch(files: List[UploadFile] = File(...)):
+    """
+    Analyze many cards in one request. Files are fanned out across the OCR
+    workers and results stream back as NDJSON, one line per file in
+    completion order, tagged with the file's index in the upload; a file that
+    fails gets an "error" instead of "analysis"/"summary".
+    """
+    if len(files) > BATCH_MAX_FILES:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_FILES} files per batch")
+    # Read everything up front: the uploads are closed once this handler returns
+    items = [(index, file.filename, await file.read()) for index, file in enumerate(files)]
+    # One batch keeps at most one job per worker in flight so it cannot fill the OCR queue alone
+    limit = asyncio.Semaphore(ocr_executor.max_workers)
+
+    async def stream():
+        tasks = [asyncio.create_task(_analyze_item(*item, limit)) for item in items]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield json.dumps(await next_done) + "\n"
+        finally:
+            # Client went away: drop the files that have not started yet
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+@router.get("/cache_stats")
+def ocr_cache_stats():
+    return ocr_cache.stats()
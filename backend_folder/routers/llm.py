@@ -2,6 +2,7 @@ from fastapi import APIRouter, UploadFile, File
 from pydantic import BaseModel
 from typing import Optional, List
 from module import ins_llm_loader
+from module.openfda_client import get_openfda_client
 import pandas as pd
 
 router = APIRouter()
@@ -16,8 +17,12 @@ class QueryRequest(BaseModel):
 
 @router.post("/load_insurance_data")
 def load_insurance_data_endpoint(path: str):
-    df, docs = ins_llm_loader.load_insurance_data(path)
-    return {"df_shape": df.shape, "docs_count": len(docs)}
+    dataset = ins_llm_loader.insurance_data_cache.get(path)
+    return {"df_shape": dataset.df.shape, "docs_count": len(dataset.docs)}
+
+@router.get("/insurance_cache_stats")
+def insurance_cache_stats_endpoint():
+    return ins_llm_loader.insurance_data_cache.stats()
 
 @router.post("/chunk_documents")
 def chunk_documents_endpoint(docs: List[str], chunk_size: int = 300, chunk_overlap: int = 30):
@@ -35,39 +40,36 @@ def setup_llm_chain_endpoint():
     return {"message": "setup_llm_chain requires a retriever object"}
 
 @router.post("/get_drugs_for_symptom")
-def get_drugs_for_symptom_endpoint(symptom: str):
-    drugs = ins_llm_loader.get_drugs_for_symptom(symptom)
+async def get_drugs_for_symptom_endpoint(symptom: str):
+    drugs = await get_openfda_client().aget_drugs_for_symptom(symptom)
     return {"drugs": drugs}
 
 @router.post("/extract_text_from_card")
 def extract_text_from_card_endpoint(file: UploadFile = File(...)):
-    filename = file.filename if file.filename is not None else "uploaded_file"
-    with open(filename, "wb") as f:
-        f.write(file.file.read())
-    text = ins_llm_loader.extract_text_from_card(filename)
+    # Decode from the upload buffer; never write client-named files to disk
+    text = ins_llm_loader.extract_text_from_card_bytes(file.file.read())
     return {"text": text}
 
 @router.post("/lookup_insurance")
-def lookup_insurance_endpoint(path: str, name_input: str):
-    df, _ = ins_llm_loader.load_insurance_data(path)
-    result = ins_llm_loader.lookup_insurance(df, name_input)
+def lookup_insurance_endpoint(path: str, name_input: str, fuzzy: bool = False):
+    dataset = ins_llm_loader.insurance_data_cache.get(path)
+    result = ins_llm_loader.lookup_insurance(dataset.df, name_input, index=dataset.name_index, fuzzy=fuzzy)
     return {"result": result}
 
 @router.post("/match_plans_by_symptom")
-def match_plans_by_symptom_endpoint(path: str, drugs: List[str]):
-    df, _ = ins_llm_loader.load_insurance_data(path)
-    result = ins_llm_loader.match_plans_by_symptom(df, drugs)
+def match_plans_by_symptom_endpoint(path: str, drugs: List[str], match_all: bool = False):
+    dataset = ins_llm_loader.insurance_data_cache.get(path)
+    result = ins_llm_loader.match_plans_by_symptom(
+        dataset.df, drugs, index=dataset.coverage_index, match_all=match_all
+    )
     return {"result": result}
 
 @router.post("/handle_chat_query")
 def handle_chat_query_endpoint(request: QueryRequest, path: Optional[str] = None):
-    df, docs = (None, None)
-    if path:
-        df, docs = ins_llm_loader.load_insurance_data(path)
+    dataset = ins_llm_loader.insurance_data_cache.get(path) if path else None
     result = ins_llm_loader.handle_chat_query(
         request.query,
-        df,
-        docs,
-        card_fields=request.card_fields
+        card_fields=request.card_fields,
+        dataset=dataset
     )
     return {"result": result}
@@ -3,7 +3,8 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
 from typing import Optional
-from module.rag_cost_recomm import HealthcareAIAssistant
+from starlette.concurrency import run_in_threadpool
+from ..services.assistant_service import assistant_service
 
 router = APIRouter()
 
@@ -20,15 +21,22 @@ class EntitiesResponse(BaseModel):
 
 @router.post("/query", response_model=EntitiesResponse)
 async def extract_entities(request: QueryRequest):
-    assistant = HealthcareAIAssistant()
+    # Shared, already-indexed assistant owned by the app lifespan
+    assistant = assistant_service.get()
     # Fetch data from Back4app (Parse)
-    parse_data = assistant.get_data_from_parse()
+    parse_data = await run_in_threadpool(assistant.get_data_from_parse)
     # Create a sample patient and process the query
     patient = assistant.create_sample_patient(has_insurance=True)
-    result = assistant.process_query(request.text, patient)
+    result = await run_in_threadpool(assistant.process_query, request.text, patient)
     # Return both the processed result and the parse data
     return EntitiesResponse(
         response=result,
         patient_info=parse_data,
         parse_data=parse_data
-    )
\ No newline at end of file
+    )
+
+
+@router.get("/embedding_cache_stats")
+def embedding_cache_stats():
+    # Hit rate of the query-embedding cache in front of the procedures collection
+    return assistant_service.get().vector_db.embedding_function.stats()
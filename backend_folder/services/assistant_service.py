@@ -0,0 +1,74 @@
+import os
+import threading
+from typing import TYPE_CHECKING, Callable, Optional
+
+if TYPE_CHECKING:
+    from module.rag_cost_recomm import HealthcareAIAssistant
+
+
+def default_factory() -> "HealthcareAIAssistant":
+    """
+    Serve from the prebuilt index snapshot named by HEALTHCARE_INDEX_SNAPSHOT
+    when set (no embedding at startup), otherwise build the catalog in place.
+    """
+    # Imported here so importing the app does not load chromadb
+    from module.rag_cost_recomm import HealthcareAIAssistant
+
+    snapshot = os.getenv("HEALTHCARE_INDEX_SNAPSHOT")
+    if not snapshot:
+        return HealthcareAIAssistant()
+    from module.index_snapshot import load_snapshot
+
+    assistant = HealthcareAIAssistant(load_snapshot(snapshot))
+    # The snapshot already holds the catalog
+    assistant.sample_data_loaded = True
+    return assistant
+
+
+class AssistantService:
+    """
+    Owns the process-wide HealthcareAIAssistant used by the API routers.
+    The assistant is built once (vector DB client, engines and the indexed
+    catalog) and shared by every request; reload() swaps in a fresh one.
+    """
+
+    def __init__(self, factory: Callable[[], "HealthcareAIAssistant"] = default_factory):
+        self._factory = factory
+        self._assistant: Optional["HealthcareAIAssistant"] = None
+        self._lock = threading.Lock()
+
+    def _build(self) -> "HealthcareAIAssistant":
+        assistant = self._factory()
+        # Index the catalog up front so the request path never mutates the assistant
+        if not assistant.sample_data_loaded:
+            assistant.load_sample_data()
+        return assistant
+
+    def start(self) -> "HealthcareAIAssistant":
+        """Build the assistant eagerly (called from the app lifespan)."""
+        return self.get()
+
+    def get(self) -> "HealthcareAIAssistant":
+        """Return the shared assistant, building it on first use."""
+        assistant = self._assistant
+        if assistant is None:
+            with self._lock:
+                if self._assistant is None:
+                    self._assistant = self._build()
+                assistant = self._assistant
+        return assistant
+
+    def reload(self) -> "HealthcareAIAssistant":
+        """Build a new assistant and atomically replace the current one.
+        In-flight requests keep using the instance they already hold."""
+        assistant = self._build()
+        with self._lock:
+            self._assistant = assistant
+        return assistant
+
+    def shutdown(self):
+        with self._lock:
+            self._assistant = None
+
+
+assistant_service = AssistantService()
@@ -1,11 +1,126 @@
-import tempfile
-from insurance_analyzer import insurance_ocr
-
-def extract_insurance_info(file_bytes: bytes) -> dict:
-    """Extract insurance info from uploaded image file using insurance_ocr module"""
-    with tempfile.NamedTemporaryFile(suffix=".png", delete=True) as tmp:
-        tmp.write(file_bytes)
-        tmp.flush()
-        result = insurance_ocr.analyze_insurance_card(tmp.name)
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from insurance_analyzer.ocr_cache import OCRResultCache, content_hash
+# Jobs and the initializer live outside this module: spawned workers import the
+# module of every function they run, and this one builds the result cache
+from insurance_analyzer.ocr_worker import extract_insurance_info, warm_worker
+
+logger = logging.getLogger(__name__)
+
+
+class OCRSaturatedError(Exception):
+    """Raised when the OCR queue is full; routers turn it into a 503."""
+
+
+class OCRExecutor:
+    """
+    Bounded process pool for OpenCV/Tesseract work so card uploads never block
+    the event loop. At most `max_pending` jobs (running + queued) are accepted;
+    beyond that submit() raises OCRSaturatedError instead of queueing forever.
+    A job holds its slot until the worker finishes it, even when the request
+    awaiting it is cancelled. A pool broken by a crashed worker is replaced.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_pending: Optional[int] = None):
+        self.max_workers = max_workers or int(os.getenv("OCR_WORKERS", str(os.cpu_count() or 1)))
+        self.max_pending = max_pending or int(os.getenv("OCR_MAX_PENDING", str(self.max_workers * 4)))
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    # spawn: the API process runs background threads, which fork does not copy safely
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=warm_worker,
+                    )
+        return self._pool
+
+    def start(self):
+        """Spawn the workers now (the pool otherwise starts them on demand)."""
+        pool = self._get_pool()
+        for _ in range(self.max_workers):
+            pool.submit(os.getpid)
+
+    def _discard_pool(self, pool: ProcessPoolExecutor):
+        """Drop a broken pool so the next job starts a fresh one."""
+        with self._lock:
+            if self._pool is not pool:
+                return
+            self._pool = None
+        logger.warning("OCR worker pool broke (a worker died); starting a new one")
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _release(self, _future: Future):
+        with self._lock:
+            self._pending -= 1
+
+    def _submit(self, fn, *args):
+        pool = self._get_pool()
+        try:
+            return pool, pool.submit(fn, *args)
+        except BrokenProcessPool:
+            self._discard_pool(pool)
+            pool = self._get_pool()
+            return pool, pool.submit(fn, *args)
+
+    async def submit(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise OCRSaturatedError(f"OCR queue full ({self._pending} pending)")
+            self._pending += 1
+        try:
+            pool, future = self._submit(fn, *args)
+        except BaseException:
+            self._release(None)
+            raise
+        # Released when the job really ends, not when the awaiting request goes away
+        future.add_done_callback(self._release)
+        try:
+            return await asyncio.wrap_future(future)
+        except BrokenProcessPool:
+            self._discard_pool(pool)
+            raise
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+ocr_executor = OCRExecutor()
+
+
+# OCR_CACHE_DIR persists extracted member data (names, IDs) in plaintext; see OCRResultCache
+ocr_cache = OCRResultCache(
+    max_entries=int(os.getenv("OCR_CACHE_SIZE", "512")),
+    persist_dir=os.getenv("OCR_CACHE_DIR") or None,
+)
+
+
+async def extract_insurance_info_async(file_bytes: bytes) -> dict:
+    """Return a cached analysis for this card if we have one, otherwise run
+    extract_insurance_info in the OCR process pool and cache the result."""
+    key = content_hash(file_bytes)
+    result = ocr_cache.lookup(key)
+    if result is not None:
         return result
-    
\ No newline at end of file
+    result = await ocr_executor.submit(extract_insurance_info, file_bytes)
+    ocr_cache.store(key, result)
+    return result
@@ -0,0 +1,101 @@
+"""
+CMS provider search: row-wise `apply(str(row))` scan versus SubstringIndex
+on synthetic provider tables of 10k, 100k and 1M rows.
+
+Every timed query is distinct and run once with the index's fragment
+expansion cache cleared, so the numbers are cold lookups rather than cache
+hits. Queries come in kinds: one-word infix fragments (open at both ends,
+the worst case for the token index), NPI numbers, two-word phrases taken
+from rows, and strings that match nothing.
+
+Run from the repo root:
+    python -m benchmarks.bench_cms_search
+    python -m benchmarks.bench_cms_search --sizes 10000 100000 --scan-limit 100000
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+import pandas as pd
+
+from module.text_index import SubstringIndex
+
+SPECIALTIES = ["Cardiology", "Family Practice", "Internal Medicine", "Radiology",
+               "Orthopedic Surgery", "Dermatology", "Pediatrics", "Oncology"]
+CITIES = ["Houston", "Dallas", "Austin", "San Antonio", "El Paso", "Plano"]
+LAST = ["Smith", "Johnson", "Garcia", "Nguyen", "Patel", "Brown", "Lee", "Martinez"]
+QUERIES = ["cardiology", "nguyen", "san antonio", "family practice", "npi 1000042", "zzz-no-match"]
+
+
+def make_providers(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Rndrng_NPI": [f"NPI {1000000 + i}" for i in range(n)],
+        "Rndrng_Prvdr_Last_Org_Name": rng.choice(LAST, n),
+        "Rndrng_Prvdr_Type": rng.choice(SPECIALTIES, n),
+        "Rndrng_Prvdr_City": rng.choice(CITIES, n),
+        "Rndrng_Prvdr_State_Abrvtn": "TX",
+    })
+
+
+def scan_search(df: pd.DataFrame, query: str):
+    q = query.lower()
+    return df[df.apply(lambda row: q in str(row).lower(), axis=1)].head(5)
+
+
+def distinct_queries(df: pd.DataFrame, per_kind: int, seed: int = 0):
+    """Query kind -> distinct queries drawn from the table's own values."""
+    rng = random.Random(seed)
+    words = sorted({w.lower() for col in ("Rndrng_Prvdr_Last_Org_Name", "Rndrng_Prvdr_Type", "Rndrng_Prvdr_City")
+                    for value in df[col].unique() for w in value.split()})
+    fragments = sorted({w[i:j] for w in words for i in range(len(w)) for j in range(i + 2, len(w) + 1)})
+    rows = rng.sample(range(len(df)), min(per_kind, len(df)))
+    return {
+        "infix": rng.sample(fragments, min(per_kind, len(fragments))),
+        "npi": [f"npi {1000000 + rng.randrange(len(df))}" for _ in range(per_kind)],
+        "phrase": [f"{df.iat[r, 2].split()[-1]}\n{df.iat[r, 3]}".lower() for r in rows],
+        "no match": [f"zq{i}x" for i in range(per_kind)],
+    }
+
+
+def _cold_ms(index: SubstringIndex, fn) -> float:
+    index._expand.cache_clear()
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=200, help="distinct queries per kind")
+    parser.add_argument("--scan-limit", type=int, default=100_000,
+                        help="skip the row-wise scan above this many rows")
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        df = make_providers(n)
+        start = time.perf_counter()
+        index = SubstringIndex.from_dataframe(df)
+        build_s = time.perf_counter() - start
+        # get_cms_provider_data() builds the infix postings at load, as here
+        start = time.perf_counter()
+        index.build_infix_postings()
+        infix_s = time.perf_counter() - start
+        print(f"\n{n:,} rows  (index build {build_s:.2f} s + infix postings {infix_s:.2f} s)")
+        for kind, queries in distinct_queries(df, args.queries).items():
+            times = [_cold_ms(index, lambda: df.iloc[index.search(q, limit=5)]) for q in queries]
+            print(f"  {kind:<10} {len(queries):4d} distinct  p50 {np.percentile(times, 50):8.3f} ms   "
+                  f"p95 {np.percentile(times, 95):8.3f} ms   max {max(times):8.3f} ms")
+        if n <= args.scan_limit:
+            for query in QUERIES:
+                indexed = _cold_ms(index, lambda: df.iloc[index.search(query, limit=5)])
+                start = time.perf_counter()
+                scan_search(df, query)
+                scan = (time.perf_counter() - start) * 1000
+                print(f"  {query:<16} index {indexed:8.3f} ms   scan {scan:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
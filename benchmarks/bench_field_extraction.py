@@ -0,0 +1,105 @@
+"""
+Card field extraction on synthetic OCR strings of increasing length: the
+original per-pattern regex implementation versus FieldExtractor. The new
+engine should grow linearly with text length; the original's lazy and
+lookahead-heavy findall sweeps grow much faster on long, label-free runs.
+
+Run from the repo root:
+    python -m benchmarks.bench_field_extraction --lengths 500 2000 8000 32000
+"""
+import argparse
+import random
+import re
+import time
+
+from insurance_analyzer.field_extractor import default_extractor
+
+CARD_TEXT = ("Subscriber Name: John Q Public Subscriber ID: XJH123456789 Group No: 98765 "
+             "RxBin/Group 610014 RX Date Issued: 01/15/2024 Primary: $25 Specialist: $50 "
+             "Urgent Care: $75 ER: $250 Prescription Drug: $10/$35/$60 Preventive Care: No Charge "
+             "$30 Copay No Deductible Members: Self Responsibility: See plan documents")
+NOISE_WORDS = ["benefits", "network", "provider", "call", "member", "services", "claims",
+               "pharmacy", "coverage", "plan", "health", "this card", "does not", "guarantee"]
+
+
+def legacy_extract(text):
+    fields = {}
+    patterns = {
+        "subscriber_name": r"Subscriber Name[:\s]*([A-Za-z .]+)",
+        "subscriber_id": r"Subscriber ID[:\s]*([A-Z0-9]+)",
+        "group_no": r"Group No[:\s]*([0-9]+)",
+        "rxbin_group": r"RxBin/Group[:\s]*([0-9A-Z ]+)",
+        "date_issued": r"Date Issued[:\s]*([0-9/]+)",
+        "primary": r"Primary[:\s]*\$?([0-9]+)",
+        "specialist": r"Specialist[:\s]*\$?([0-9]+)",
+        "urgent_care": r"Urgent Care[:\s]*\$?([0-9]+)",
+        "er": r"ER[:\s]*\$?([0-9]+)",
+        "prescription_drug": r"Prescription Drug[:\s]*([\$0-9/ %\-]+)",
+        "preventive_care": r"Preventive Care[:\s]*([A-Za-z ]+)",
+        "copay": r"Copay[:\s]*\$?([0-9]+)",
+        "deductible": r"Deductible[:\s]*\$?([0-9]+)",
+    }
+    for key, pat in patterns.items():
+        match = re.search(pat, text, re.IGNORECASE)
+        if match:
+            fields[key] = match.group(1).strip()
+    for key in ["Copay", "Deductible"]:
+        match = re.search(rf'(\$\d+|No)[\s\n\r\t\-:]*{key}', text, re.IGNORECASE | re.MULTILINE)
+        if not match:
+            match = re.search(rf'{key}[\s\n\r\t\-:]*([\$\d]+|No)', text, re.IGNORECASE | re.MULTILINE)
+        if match:
+            val = match.group(1)
+            fields[key.lower()] = val if val.lower() != 'no' else '0'
+    for label, value in re.findall(r'([A-Za-z ]+?)[:\s\-]+\$([0-9]+(?:/[0-9]+)*(?:%|))', text):
+        label_key = label.strip().lower().replace(' ', '_')
+        if label_key not in fields:
+            fields[label_key] = value.strip()
+    for label, value in re.findall(r'([A-Za-z][A-Za-z0-9 /-]+)[:\s]+([A-Za-z0-9$%/., -]+?)(?= [A-Z][a-zA-Z]+:|$)', text):
+        label_key = label.strip().lower().replace(' ', '_').replace('-', '_')
+        if label_key not in fields and len(value.strip()) > 0:
+            fields[label_key] = value.strip()
+    return fields
+
+
+def synthetic_ocr(length: int, seed: int = 0) -> str:
+    """A card's text followed by long runs of label-free OCR noise (fine print)."""
+    rng = random.Random(seed)
+    parts = [CARD_TEXT]
+    size = len(CARD_TEXT)
+    while size < length:
+        word = rng.choice(NOISE_WORDS)
+        parts.append(word)
+        size += len(word) + 1
+    return " ".join(parts)[:length]
+
+
+def _time_ms(fn, text, budget_s: float = 1.0) -> float:
+    runs, start = 0, time.perf_counter()
+    while True:
+        fn(text)
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= budget_s or runs >= 50:
+            return elapsed / runs * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lengths", type=int, nargs="+", default=[500, 2000, 8000, 32000])
+    parser.add_argument("--legacy-limit", type=int, default=8000,
+                        help="skip the original implementation above this length")
+    args = parser.parse_args()
+
+    for length in args.lengths:
+        text = synthetic_ocr(length)
+        new_ms = _time_ms(default_extractor.extract, text)
+        line = f"{length:>8} chars  engine {new_ms:9.3f} ms ({new_ms / length * 1e6:7.1f} ns/char)"
+        if length <= args.legacy_limit:
+            assert legacy_extract(text) == default_extractor.extract(text), "field dicts differ"
+            old_ms = _time_ms(legacy_extract, text)
+            line += f"   original {old_ms:10.3f} ms ({old_ms / length * 1e6:9.1f} ns/char)"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Wall time of `import backend_folder.main` in a fresh interpreter, plus the
+slowest imports reported by `python -X importtime`. Also checks that the
+import leaves the lazily created resources of module.ins_llm_loader (vector
+DB, CMS provider data) uncreated, i.e. that importing does no network or
+database work.
+
+The exit status is non-zero when the median import time exceeds
+--max-seconds (default 2.0; always enforced), or when the import touches the
+lazy resources, so it gates CI as an import-time regression check.
+
+Run from the repo root:
+    python -m benchmarks.bench_import_time --runs 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+CHILD = (
+    "import backend_folder.main\n"
+    "from module import ins_llm_loader\n"
+    "assert ins_llm_loader._vector_db is None, 'import opened the vector DB'\n"
+    "assert ins_llm_loader._cms_provider_data is None, 'import fetched CMS data'\n"
+)
+# Median wall time allowed for the import, interpreter startup included
+DEFAULT_MAX_SECONDS = 2.0
+
+
+def run_import(env, importtime: bool = False):
+    args = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", CHILD]
+    start = time.perf_counter()
+    proc = subprocess.run(args, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        sys.exit(f"import failed:\n{proc.stderr[-2000:]}")
+    return elapsed, proc.stderr
+
+
+def slowest_imports(report: str, top: int, parent: str = "backend_folder.main"):
+    # Lines look like "import time:  self [us] | cumulative | imported package", with nested
+    # imports indented two spaces per level and listed before the module that imported them
+    children = []
+    for line in report.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.rsplit("|", 2)
+        name = name[1:]
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        if depth == 1:
+            children.append((int(cumulative_us), name.strip()))
+        elif depth == 0:
+            # Report what `parent` imports directly; everything is nested under it
+            if name == parent:
+                return sorted(children, reverse=True)[:top]
+            children = []
+    return []
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--max-seconds", type=float, default=DEFAULT_MAX_SECONDS,
+                        help="fail when the median import time exceeds this")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    # main.py refuses to import without a key; nothing here talks to OpenAI
+    env.setdefault("OPEN_AI_KEY", "bench")
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.getcwd(), env.get("PYTHONPATH")]))
+
+    run_import(env)  # warm the OS file cache
+    times = [run_import(env)[0] for _ in range(args.runs)]
+    median = statistics.median(times)
+    print(f"import backend_folder.main: median {median:.2f}s, min {min(times):.2f}s, max {max(times):.2f}s "
+          f"over {args.runs} runs (includes interpreter startup)")
+    print("lazy ins_llm_loader resources untouched by import: ok")
+
+    _, report = run_import(env, importtime=True)
+    print(f"\n{'cumulative ms':>14}  imported by backend_folder.main")
+    for cumulative_us, name in slowest_imports(report, args.top):
+        print(f"{cumulative_us / 1000:14.1f}  {name}")
+
+    if median > args.max_seconds:
+        sys.exit(f"median import time {median:.2f}s exceeds --max-seconds {args.max_seconds}")
+
+
+if __name__ == "__main__":
+    main()
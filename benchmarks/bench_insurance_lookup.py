@@ -0,0 +1,124 @@
+"""
+Insurance plan lookups: full-column `str.contains` scans versus the indexes
+attached to InsuranceDataset, on synthetic plan tables of growing size.
+
+Index timings are over distinct queries, each run once with the index's
+fragment expansion cache cleared, so they are cold lookups, not cache hits.
+The query kinds are single words (open at both ends), two-word phrases,
+plan numbers and near-miss spellings for the fuzzy path. Drug coverage
+matching (match_plans_by_symptom) is timed the same way on distinct
+single-word drug names, with and without the coverage index.
+
+Run from the repo root:
+    python -m benchmarks.bench_insurance_lookup --sizes 10000 100000 500000
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+import pandas as pd
+
+from module.insurance_data import InsuranceDataset
+from module.ins_llm_loader import match_plans_by_symptom
+
+COMPANIES = ["BlueCross BlueShield", "Aetna", "UnitedHealthcare", "Cigna", "Humana",
+             "Kaiser Permanente", "Molina Healthcare", "Ambetter"]
+TIERS = ["Bronze", "Silver", "Gold", "Platinum"]
+KINDS = ["HMO", "PPO", "EPO", "POS"]
+NAME_QUERIES = ["aetna", "silver ppo", "kaiser", "plan 4242", "bluecros"]
+# Stem x suffix gives a few hundred distinct single-token drug names
+DRUG_STEMS = ["ator", "simv", "losa", "lisino", "metfor", "amlo", "omepra", "sertra", "gaba", "predni",
+              "albu", "levo", "monte", "furo", "carve", "tramo", "cetiri", "fluo", "panto", "escita"]
+DRUG_SUFFIXES = ["statin", "pril", "sartan", "olol", "dipine", "prazole", "xetine", "pentin", "mab",
+                 "cillin", "floxacin", "terol", "lukast", "semide", "zine", "mide"]
+DRUGS = [stem + suffix for stem in DRUG_STEMS for suffix in DRUG_SUFFIXES]
+
+
+def make_plans(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    tiers = rng.choice(TIERS, n)
+    kinds = rng.choice(KINDS, n)
+    covered = rng.integers(0, len(DRUGS), (n, 8))
+    return pd.DataFrame({
+        "COMPANY NAME": rng.choice(COMPANIES, n),
+        "PLAN NAME": [f"{t} {k} Plan {i}" for i, (t, k) in enumerate(zip(tiers, kinds))],
+        "COVERAGE": [", ".join(DRUGS[d] for d in row) for row in covered],
+    })
+
+
+def scan_lookup(df: pd.DataFrame, name: str) -> pd.DataFrame:
+    name = name.lower()
+    return df[df["COMPANY NAME"].str.lower().str.contains(name, regex=False) |
+              df["PLAN NAME"].str.lower().str.contains(name, regex=False)]
+
+
+def distinct_name_queries(df: pd.DataFrame, per_kind: int, seed: int = 0):
+    """Query kind -> distinct name queries drawn from the table's own values."""
+    rng = random.Random(seed)
+    words = sorted({w.lower() for name in COMPANIES + TIERS + KINDS for w in name.split()})
+    fragments = sorted({w[i:j] for w in words for i in range(len(w)) for j in range(i + 2, len(w) + 1)})
+    rows = rng.sample(range(len(df)), min(per_kind, len(df)))
+    misspelled = []
+    for r in rows:
+        word = df.iat[r, 0].split()[0].lower()
+        cut = rng.randrange(len(word))
+        misspelled.append(word[:cut] + word[cut + 1:])
+    return {
+        "word": rng.sample(fragments, min(per_kind, len(fragments))),
+        "phrase": [" ".join(df.iat[r, 1].split()[:2]).lower() for r in rows],
+        "plan no.": [f"plan {rng.randrange(len(df))}" for _ in range(per_kind)],
+        "misspelled": misspelled,
+    }
+
+
+def _cold_ms(index, fn) -> float:
+    index._expand.cache_clear()
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def _summary(times) -> str:
+    return f"p50 {np.percentile(times, 50):8.3f} ms  p95 {np.percentile(times, 95):8.3f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 500_000])
+    parser.add_argument("--queries", type=int, default=100, help="distinct queries per kind")
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        df = make_plans(n)
+        dataset = InsuranceDataset("synthetic", df, [], ("synthetic", 0, 0))
+        start = time.perf_counter()
+        index = dataset.name_index
+        build = time.perf_counter() - start
+        # Infix and fuzzy postings are built by their first query; report that once
+        first = _cold_ms(index, lambda: (index.search("zz"), index.fuzzy_search("zz")))
+        print(f"\n{n:,} plans  (name index build {build:.2f} s, first infix/fuzzy query {first:.0f} ms)")
+        for kind, queries in distinct_name_queries(df, args.queries).items():
+            exact = [_cold_ms(index, lambda: index.search(q)) for q in queries]
+            fuzzy = [_cold_ms(index, lambda: index.fuzzy_search(q, limit=20)) for q in queries]
+            print(f"  {kind:<10} {len(queries):4d} distinct  index {_summary(exact)}   fuzzy {_summary(fuzzy)}")
+        drugs = random.Random(n).sample(DRUGS, min(args.queries, len(DRUGS)))
+        coverage_index = dataset.coverage_index
+        coverage_index.search("zz")  # builds the infix postings, already reported above for names
+        indexed = [_cold_ms(coverage_index, lambda: match_plans_by_symptom(df, [d], index=coverage_index))
+                   for d in drugs]
+        scanned = []
+        for drug in drugs[:10]:
+            start = time.perf_counter()
+            match_plans_by_symptom(df, [drug])
+            scanned.append((time.perf_counter() - start) * 1000)
+        print(f"  {'drug':<10} {len(drugs):4d} distinct  coverage index {_summary(indexed)}   "
+              f"scan {_summary(scanned)}")
+        for name in NAME_QUERIES:
+            start = time.perf_counter()
+            scan_lookup(df, name)
+            print(f"  {name:<12} scan {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
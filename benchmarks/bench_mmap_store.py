@@ -0,0 +1,147 @@
+"""
+Recall@k and query latency of the memory-mapped procedure store (int8 and
+float16, exact and IVF at several nprobe values) against exact float32
+search, with Chroma's HNSW index as the baseline. Embeddings are synthetic
+clustered unit vectors shaped like the default MiniLM model (384 dims);
+queries are perturbed catalog rows.
+
+Run from the repo root:
+    python -m benchmarks.bench_mmap_store --rows 1000000 --chroma-rows 100000
+"""
+import argparse
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from module.mmap_store import MmapStoreWriter
+
+CHUNK = 100_000
+
+
+def synthetic_embeddings(rows: int, dim: int, clusters: int, rng: np.random.Generator):
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    for start in range(0, rows, CHUNK):
+        size = min(CHUNK, rows - start)
+        block = centers[rng.integers(0, clusters, size)] + rng.normal(scale=0.8, size=(size, dim)).astype(np.float32)
+        yield block / np.linalg.norm(block, axis=1, keepdims=True)
+
+
+def exact_top_k(chunks, queries: np.ndarray, k: int) -> np.ndarray:
+    best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+    best_scores = np.zeros((len(queries), 0), dtype=np.float32)
+    offset = 0
+    for block in chunks:
+        scores = np.concatenate([best_scores, queries @ block.T], axis=1)
+        rows = np.concatenate([best_rows, np.broadcast_to(np.arange(offset, offset + len(block)),
+                                                          (len(queries), len(block)))], axis=1)
+        keep = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(scores, keep, axis=1)
+        best_rows = np.take_along_axis(rows, keep, axis=1)
+        offset += len(block)
+    return best_rows
+
+
+def recall(found, truth, k: int) -> float:
+    return float(np.mean([len(set(f[:k]) & set(t)) / k for f, t in zip(found, truth)]))
+
+
+def time_queries(search, queries):
+    latencies, results = [], []
+    for q in queries:
+        start = time.perf_counter()
+        results.append(search(q))
+        latencies.append(time.perf_counter() - start)
+    return results, np.percentile(latencies, 50) * 1000, np.percentile(latencies, 95) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 16, 64])
+    parser.add_argument("--chroma-rows", type=int, default=100_000, help="0 skips the Chroma baseline")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    def chunks():
+        return synthetic_embeddings(args.rows, args.dim, 1024, np.random.default_rng(args.seed))
+
+    sample = next(chunks())
+    rng = np.random.default_rng(args.seed + 1)
+    queries = sample[rng.integers(0, len(sample), args.queries)]
+    queries = queries + rng.normal(scale=0.02, size=queries.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    truth = exact_top_k(chunks(), queries, args.k)
+    float32_mb = args.rows * args.dim * 4 / 2 ** 20
+    print(f"{args.rows} rows x {args.dim} dims (float32 would be {float32_mb:.0f} MB), "
+          f"{args.queries} queries, recall@{args.k}")
+    print(f"{'store':<28}{'build s':>9}{'MB':>8}{'recall':>8}{'p50 ms':>9}{'p95 ms':>9}")
+
+    workdir = tempfile.mkdtemp(prefix="mmap_store_bench_")
+    try:
+        for dtype in ("int8", "float16"):
+            path = f"{workdir}/{dtype}"
+            start = time.perf_counter()
+            writer = MmapStoreWriter(path, args.dim, dtype)
+            offset = 0
+            for block in chunks():
+                writer.add([f"row{offset + i}" for i in range(len(block))], block, [{}] * len(block))
+                offset += len(block)
+            store = writer.finalize(nlist=int(4 * np.sqrt(args.rows)))
+            build = time.perf_counter() - start
+            mb = store.nbytes / 2 ** 20
+            for nprobe in [None] + args.nprobe:
+                found, p50, p95 = time_queries(
+                    lambda q: [row for row, _ in store.search(q, args.k, nprobe=nprobe)[0]], queries)
+                # IVF reorders rows; map back to insertion order through the stored ids
+                found = [[int(store.record_id(row)[3:]) for row in rows] for rows in found]
+                label = f"{dtype} " + ("exact" if nprobe is None else f"ivf nprobe={nprobe}")
+                print(f"{label:<28}{build:9.1f}{mb:8.0f}{recall(found, truth, args.k):8.3f}{p50:9.2f}{p95:9.2f}")
+
+        if args.chroma_rows:
+            try:
+                import chromadb
+            except ImportError:
+                print("chromadb not installed; skipping the Chroma baseline")
+                return
+            rows = min(args.chroma_rows, args.rows)
+            client = chromadb.PersistentClient(path=f"{workdir}/chroma")
+            collection = client.create_collection("bench", metadata={"hnsw:space": "cosine"})
+            batch = client.get_max_batch_size() if hasattr(client, "get_max_batch_size") else 5000
+            start = time.perf_counter()
+            offset = 0
+            for block in chunks():
+                block = block[:rows - offset]
+                for i in range(0, len(block), batch):
+                    part = block[i:i + batch]
+                    collection.add(ids=[f"row{offset + i + j}" for j in range(len(part))], embeddings=part.tolist())
+                offset += len(block)
+                if offset >= rows:
+                    break
+            build = time.perf_counter() - start
+            sub_truth = exact_top_k(_limited(chunks(), rows), queries, args.k)
+            found, p50, p95 = time_queries(
+                lambda q: [int(i[3:]) for i in collection.query(query_embeddings=[q.tolist()],
+                                                                n_results=args.k)["ids"][0]], queries)
+            label = f"chroma hnsw ({rows} rows)"
+            print(f"{label:<28}{build:9.1f}{'-':>8}{recall(found, sub_truth, args.k):8.3f}{p50:9.2f}{p95:9.2f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _limited(chunks, rows: int):
+    seen = 0
+    for block in chunks:
+        block = block[:rows - seen]
+        seen += len(block)
+        yield block
+        if seen >= rows:
+            return
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Per-request latency of the /api/nlp/query work, before and after sharing
+one HealthcareAIAssistant across requests.
+
+Run from the repo root:
+    python -m benchmarks.bench_nlp_query --requests 20
+"""
+import argparse
+import time
+
+import numpy as np
+
+from module.rag_cost_recomm import HealthcareAIAssistant
+from backend_folder.services.assistant_service import AssistantService
+
+QUERIES = [
+    "I need an MRI for my brain",
+    "I need knee surgery",
+    "I need blood work done",
+    "I need a routine checkup",
+]
+
+
+def per_request(query: str):
+    """Old behaviour: a fresh assistant (client, engines, catalog) per call."""
+    assistant = HealthcareAIAssistant()
+    patient = assistant.create_sample_patient(has_insurance=True)
+    return assistant.process_query(query, patient)
+
+
+def shared(service: AssistantService, query: str):
+    assistant = service.get()
+    patient = assistant.create_sample_patient(has_insurance=True)
+    return assistant.process_query(query, patient)
+
+
+def _timings(fn, n: int):
+    samples = []
+    for i in range(n):
+        start = time.perf_counter()
+        fn(QUERIES[i % len(QUERIES)])
+        samples.append((time.perf_counter() - start) * 1000)
+    return np.array(samples)
+
+
+def _report(label: str, samples):
+    print(f"{label:<12} p50={np.percentile(samples, 50):8.1f} ms  "
+          f"p99={np.percentile(samples, 99):8.1f} ms  mean={samples.mean():8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+
+    service = AssistantService()
+    start = time.perf_counter()
+    service.start()
+    print(f"Warm-up (lifespan) cost: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    _report("per-request", _timings(per_request, args.requests))
+    _report("shared", _timings(lambda q: shared(service, q), args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Per-image OCR latency of each OCR backend on the sample cards. pytesseract
+starts a tesseract process (and reloads the language model) for every
+image; tesserocr keeps one engine loaded, so the difference is roughly the
+model-load cost per card.
+
+Run from the repo root (needs tesseract; tesserocr for the second row):
+    python -m benchmarks.bench_ocr_backend --repeat 5
+"""
+import argparse
+import glob
+import os
+import time
+
+import cv2
+
+from insurance_analyzer.ocr_backend import create_backend
+from insurance_analyzer.preprocess import preprocess
+
+CARD_DIR = os.path.join(os.path.dirname(__file__), "..", "insurance_analyzer", "sampleinsurancecard")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    images = [preprocess(cv2.imread(path)) for path in sorted(glob.glob(os.path.join(CARD_DIR, "*.png")))]
+    if not images:
+        raise SystemExit(f"No sample cards found in {CARD_DIR}")
+
+    for name in ("pytesseract", "tesserocr"):
+        try:
+            start = time.perf_counter()
+            backend = create_backend(name)
+            init_ms = (time.perf_counter() - start) * 1000
+        except (ImportError, RuntimeError) as e:
+            print(f"{name:<12} unavailable: {e}")
+            continue
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for image in images:
+                backend.image_to_string(image)
+        per_image = (time.perf_counter() - start) * 1000 / (args.repeat * len(images))
+        print(f"{name:<12} init {init_ms:7.1f} ms   {per_image:7.1f} ms/image")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Card OCR throughput through OCRExecutor as the worker count grows, with many
+uploads in flight at once (as concurrent /api/insurance/analyze calls would).
+
+Run from the repo root:
+    python -m benchmarks.bench_ocr_concurrency --jobs 32 --workers 1 2 4 8
+"""
+import argparse
+import asyncio
+import glob
+import os
+import time
+
+from backend_folder.services.ocr_service import OCRExecutor, extract_insurance_info
+
+CARD_DIR = os.path.join(os.path.dirname(__file__), "..", "insurance_analyzer", "sampleinsurancecard")
+
+
+def load_cards():
+    cards = []
+    for path in sorted(glob.glob(os.path.join(CARD_DIR, "*.png"))):
+        with open(path, "rb") as f:
+            cards.append(f.read())
+    if not cards:
+        raise SystemExit(f"No sample cards found in {CARD_DIR}")
+    return cards
+
+
+async def run(executor: OCRExecutor, cards, jobs: int) -> float:
+    executor.start()
+    # Let the workers finish spawning before timing
+    await asyncio.gather(*[executor.submit(os.getpid) for _ in range(executor.max_workers)])
+    start = time.perf_counter()
+    await asyncio.gather(*[executor.submit(extract_insurance_info, cards[i % len(cards)])
+                           for i in range(jobs)])
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=32)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    cards = load_cards()
+    baseline = None
+    for workers in args.workers:
+        executor = OCRExecutor(max_workers=workers, max_pending=args.jobs)
+        try:
+            elapsed = asyncio.run(run(executor, cards, args.jobs))
+        finally:
+            executor.shutdown()
+        throughput = args.jobs / elapsed
+        baseline = baseline or throughput
+        print(f"workers={workers:<3} {elapsed:7.2f} s  {throughput:6.2f} cards/s  "
+              f"speedup x{throughput / baseline:.2f}")
+
+
+if __name__ == "__main__":
+    main()
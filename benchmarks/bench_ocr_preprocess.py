@@ -0,0 +1,173 @@
+"""
+Card OCR preprocessing settings compared on synthetic card photos: per-stage
+time (gray, crop, scale, threshold, tesseract) and field-extraction accuracy
+against the values rendered onto each card. Cards are drawn with
+cv2.putText at several photo resolutions, on a darker background with a
+lighting gradient and sensor noise, like a phone snapshot of a card on a
+table.
+
+With --images the configs are also run on real card files (by default the
+repo's sample cards, small cards centred on a white page): whether a card
+was found, OCR input size and, with tesseract, how many fields were read.
+
+Run from the repo root (needs the tesseract binary unless --no-ocr):
+    python -m benchmarks.bench_ocr_preprocess --cards 12 --resolutions 1280 2560 4032
+    python -m benchmarks.bench_ocr_preprocess --images "insurance_analyzer/sampleinsurancecard/*.png"
+"""
+import argparse
+import glob
+import random
+import time
+from collections import defaultdict
+
+import cv2
+import numpy as np
+
+from insurance_analyzer.insurance_ocr import extract_insurance_fields
+from insurance_analyzer.preprocess import LEGACY_CONFIG, PreprocessConfig, detect_card, preprocess
+
+CONFIGS = {
+    "legacy (2x, fixed 150, full frame)": LEGACY_CONFIG,
+    "fixed": PreprocessConfig(threshold="fixed"),
+    "otsu": PreprocessConfig(threshold="otsu"),
+    "adaptive": PreprocessConfig(threshold="adaptive"),
+    "otsu, no crop": PreprocessConfig(threshold="otsu", crop_card=False),
+    "otsu, text 24px": PreprocessConfig(threshold="otsu", target_text_height=24),
+    "otsu, text 48px": PreprocessConfig(threshold="otsu", target_text_height=48),
+}
+
+FIRST = ["John", "Maria", "Wei", "Aisha", "Carlos", "Emily", "Omar", "Priya"]
+LAST = ["Public", "Garcia", "Chen", "Khan", "Lopez", "Smith", "Nguyen", "Patel"]
+
+
+def random_fields(rng: random.Random) -> dict:
+    return {
+        "subscriber_name": f"{rng.choice(FIRST)} {rng.choice(LAST)}",
+        "subscriber_id": "".join(rng.choice("ABCDEFGHJKLMNPRSTUVWXYZ0123456789") for _ in range(10)),
+        "group_no": str(rng.randint(10000, 99999)),
+        "date_issued": f"{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}/20{rng.randint(18, 25)}",
+        "primary": str(rng.choice([10, 15, 20, 25, 30])),
+        "specialist": str(rng.choice([35, 40, 50, 60])),
+        "urgent_care": str(rng.choice([50, 75, 100])),
+        "er": str(rng.choice([150, 250, 300])),
+    }
+
+
+def render_card(fields: dict, width: int, rng: random.Random) -> np.ndarray:
+    """A card occupying ~65% of a 4:3 photo `width` pixels wide."""
+    height = width * 3 // 4
+    photo = np.zeros((height, width, 3), np.uint8)
+    photo[:] = (70, 60, 55)
+    card_w = int(width * 0.65)
+    card_h = int(card_w / 1.586)  # ID-1 card aspect ratio
+    x0 = (width - card_w) // 2 + rng.randint(-width // 40, width // 40)
+    y0 = (height - card_h) // 2 + rng.randint(-height // 40, height // 40)
+    cv2.rectangle(photo, (x0, y0), (x0 + card_w, y0 + card_h), (238, 240, 242), -1)
+
+    lines = [
+        f"Subscriber Name: {fields['subscriber_name']}",
+        f"Subscriber ID: {fields['subscriber_id']}",
+        f"Group No: {fields['group_no']}   Date Issued: {fields['date_issued']}",
+        f"Primary: ${fields['primary']}   Specialist: ${fields['specialist']}",
+        f"Urgent Care: ${fields['urgent_care']}   ER: ${fields['er']}",
+    ]
+    scale = card_w / 1100
+    thickness = max(1, int(round(scale * 2)))
+    line_h = card_h // (len(lines) + 1)
+    for i, line in enumerate(lines):
+        org = (x0 + card_w // 20, y0 + line_h * (i + 1))
+        cv2.putText(photo, line, org, cv2.FONT_HERSHEY_SIMPLEX, scale, (25, 25, 30), thickness, cv2.LINE_AA)
+
+    # Uneven lighting and sensor noise
+    gradient = np.linspace(0.75, 1.1, width, dtype=np.float32)[None, :, None]
+    noise = np.random.default_rng(rng.randint(0, 2 ** 31)).normal(0, 6, photo.shape)
+    photo = photo.astype(np.float32) * gradient + noise
+    return np.clip(photo, 0, 255).astype(np.uint8)
+
+
+def field_accuracy(expected: dict, found: dict) -> float:
+    correct = sum(1 for key, value in expected.items()
+                  if found.get(key, "").replace(" ", "").lower() == value.replace(" ", "").lower())
+    return correct / len(expected)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cards", type=int, default=12)
+    parser.add_argument("--resolutions", type=int, nargs="+", default=[1280, 2560, 4032])
+    parser.add_argument("--no-ocr", action="store_true", help="time preprocessing only")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--images", nargs="?", const="insurance_analyzer/sampleinsurancecard/*.png",
+                        help="also run on real card files matching this glob")
+    args = parser.parse_args()
+
+    if not args.no_ocr:
+        import pytesseract
+        try:
+            pytesseract.get_tesseract_version()
+        except pytesseract.TesseractNotFoundError:
+            raise SystemExit("tesseract not found; install it or pass --no-ocr")
+
+    rng = random.Random(args.seed)
+    samples = []
+    for width in args.resolutions:
+        for _ in range(args.cards):
+            fields = random_fields(rng)
+            samples.append((width, fields, render_card(fields, width, rng)))
+
+    stages = ["gray", "crop", "scale", "threshold"] + ([] if args.no_ocr else ["ocr"])
+    print(f"{len(samples)} cards at widths {args.resolutions}; mean ms per card")
+    # OCR input size is what drives tesseract time; report it alongside
+    print(f"{'config':<36}" + "".join(f"{s:>10}" for s in stages) + f"{'total':>10}{'out MP':>10}"
+          + ("" if args.no_ocr else f"{'accuracy':>10}"))
+    for name, config in CONFIGS.items():
+        timings = defaultdict(float)
+        accuracy = 0.0
+        megapixels = 0.0
+        for _, fields, image in samples:
+            prepared = preprocess(image, config, timings)
+            megapixels += prepared.size / 1e6
+            if not args.no_ocr:
+                start = time.perf_counter()
+                text = pytesseract.image_to_string(prepared).replace("\n", " ").replace("\r", " ").strip()
+                timings["ocr"] += time.perf_counter() - start
+                accuracy += field_accuracy(fields, extract_insurance_fields(text))
+        per_card = {stage: timings[stage] * 1000 / len(samples) for stage in stages}
+        row = f"{name:<36}" + "".join(f"{per_card[s]:10.1f}" for s in stages)
+        row += f"{sum(per_card.values()):10.1f}{megapixels / len(samples):10.2f}"
+        if not args.no_ocr:
+            row += f"{accuracy / len(samples):10.1%}"
+        print(row)
+
+    if args.images:
+        real_cards(sorted(glob.glob(args.images)), args.no_ocr)
+
+
+def real_cards(paths, no_ocr: bool):
+    """Per config: cards detected, mean OCR input MP and mean fields read (no ground truth)."""
+    images = [(path, cv2.imread(path)) for path in paths]
+    images = [(path, image) for path, image in images if image is not None]
+    if not images:
+        print("no readable images")
+        return
+    found = sum(detect_card(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)) is not None for _, image in images)
+    print(f"\n{len(images)} real cards, card outline found in {found}")
+    print(f"{'config':<36}{'ms':>10}{'out MP':>10}" + ("" if no_ocr else f"{'fields':>10}"))
+    for name, config in CONFIGS.items():
+        megapixels = fields = 0.0
+        start = time.perf_counter()
+        for _, image in images:
+            prepared = preprocess(image, config)
+            megapixels += prepared.size / 1e6
+            if not no_ocr:
+                import pytesseract
+                fields += len(extract_insurance_fields(pytesseract.image_to_string(prepared)))
+        elapsed = (time.perf_counter() - start) * 1000 / len(images)
+        row = f"{name:<36}{elapsed:10.1f}{megapixels / len(images):10.2f}"
+        if not no_ocr:
+            row += f"{fields / len(images):10.1f}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
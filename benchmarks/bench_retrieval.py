@@ -0,0 +1,133 @@
+"""
+Offline relevance and latency of procedure retrieval per backend (chroma,
+lexical, hybrid). The query set is the run_comprehensive_test scenarios
+plus synthetic paraphrases of the same intents; the catalog is the sample
+data plus synthetic providers and distractor procedures across many cities.
+A result is relevant when its CPT code is one the intent expects.
+
+Reports hit@1, hit@5 and MRR@10, single-query p50/p95 latency and batched
+throughput through search_procedures_many.
+
+Run from the repo root:
+    python -m benchmarks.bench_retrieval --providers 2000 --backends chroma lexical hybrid
+"""
+import argparse
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from module.rag_cost_recomm import HealthcareAIAssistant, HealthcareProcedure, HealthcareVectorDatabase
+
+# Intent -> (CPT codes that satisfy it, queries). The first query of each
+# intent is the run_comprehensive_test scenario.
+INTENTS = {
+    "mri": ({"70551"}, [
+        "I need an MRI for my brain", "brain scan", "my doctor ordered a head MRI",
+        "magnetic resonance imaging of the brain", "where can I get an MRI",
+    ]),
+    "knee": ({"29881"}, [
+        "I need knee surgery", "arthroscopic knee surgery", "torn meniscus operation",
+        "orthopedic surgeon for my knee", "knee scope procedure",
+    ]),
+    "labs": ({"80053"}, [
+        "I need blood work done", "comprehensive metabolic panel", "lab tests for my physical",
+        "blood draw at a laboratory", "routine blood tests",
+    ]),
+    "checkup": ({"99213", "G0439", "99395"}, [
+        "I need a routine checkup", "I need a checkup but have no insurance", "annual physical exam",
+        "wellness visit with my doctor", "see a primary care doctor",
+    ]),
+    "dental": ({"D0120"}, [
+        "dental cleaning and exam", "I need to see a dentist", "teeth checkup",
+    ]),
+}
+
+TEMPLATES = [
+    ("99213", "Office Visit - Established Patient", "Primary Care", 150.0),
+    ("70551", "MRI Brain without Contrast", "Radiology", 1200.0),
+    ("D0120", "Periodic Oral Evaluation", "Dentistry", 80.0),
+    ("G0439", "Annual Wellness Visit", "Primary Care", 200.0),
+    ("29881", "Knee Arthroscopy", "Orthopedics", 3500.0),
+    ("80053", "Comprehensive Metabolic Panel", "Laboratory", 45.0),
+    ("99395", "Preventive Medicine - Adult", "Primary Care", 180.0),
+    # Distractors no intent asks for
+    ("74177", "CT Abdomen and Pelvis with Contrast", "Radiology", 900.0),
+    ("71046", "Chest X-Ray 2 Views", "Radiology", 120.0),
+    ("45378", "Diagnostic Colonoscopy", "Gastroenterology", 2200.0),
+    ("97161", "Physical Therapy Evaluation", "Physical Therapy", 160.0),
+    ("90686", "Influenza Vaccine", "Primary Care", 40.0),
+    ("27447", "Total Knee Replacement", "Orthopedics", 30000.0),
+    ("85025", "Complete Blood Count", "Laboratory", 30.0),
+]
+CITIES = ["Houston, TX", "Austin, TX", "Dallas, TX", "Denver, CO", "Boston, MA", "Chicago, IL",
+          "Phoenix, AZ", "Seattle, WA", "Miami, FL", "Atlanta, GA"]
+PLANS = ["BlueCross", "Aetna", "UnitedHealth", "Cigna", "Medicare", "Medicaid"]
+
+
+def synthetic_catalog(providers: int, rng: random.Random):
+    procedures = []
+    for p in range(providers):
+        city = rng.choice(CITIES)
+        for cpt, name, specialty, cost in rng.sample(TEMPLATES, 4):
+            procedures.append(HealthcareProcedure(
+                cpt, name, round(cost * rng.uniform(0.7, 1.4), 2), f"SYN{p:06d}",
+                f"{city.split(',')[0]} {specialty} Group {p}", city, specialty,
+                rng.sample(PLANS, rng.randint(1, 4)), round(rng.uniform(3.0, 5.0), 1)))
+    return procedures
+
+
+def evaluate(db: HealthcareVectorDatabase, queries, n_results: int = 10):
+    hit1 = hit5 = rr = 0.0
+    latencies = []
+    for query, expected in queries:
+        start = time.perf_counter()
+        results = db.search_procedures(query, n_results=n_results)
+        latencies.append(time.perf_counter() - start)
+        ranks = [rank for rank, r in enumerate(results, start=1) if r["cpt_code"] in expected]
+        if ranks:
+            hit1 += ranks[0] == 1
+            hit5 += ranks[0] <= 5
+            rr += 1.0 / ranks[0]
+    start = time.perf_counter()
+    db.search_procedures_many([query for query, _ in queries], n_results=n_results)
+    batched = time.perf_counter() - start
+    n = len(queries)
+    return {
+        "hit@1": hit1 / n, "hit@5": hit5 / n, "mrr@10": rr / n,
+        "p50_ms": float(np.percentile(latencies, 50)) * 1000,
+        "p95_ms": float(np.percentile(latencies, 95)) * 1000,
+        "batch_qps": n / batched if batched > 0 else float("inf"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--providers", type=int, default=2000)
+    parser.add_argument("--backends", nargs="+", default=["chroma", "lexical", "hybrid"])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    queries = [(query, expected) for expected, phrasings in INTENTS.values() for query in phrasings]
+    catalog = synthetic_catalog(args.providers, random.Random(args.seed))
+    print(f"{len(queries)} queries over {len(catalog) + 7} procedures")
+    print(f"{'backend':<10}{'load s':>9}{'hit@1':>8}{'hit@5':>8}{'mrr@10':>8}"
+          f"{'p50 ms':>9}{'p95 ms':>9}{'batch q/s':>11}")
+    for backend in args.backends:
+        with tempfile.TemporaryDirectory() as persist_dir:
+            db = HealthcareVectorDatabase(persist_dir, retrieval_backend=backend)
+            start = time.perf_counter()
+            HealthcareAIAssistant(db).load_sample_data()
+            db.add_procedures(catalog)
+            db.search_procedures("warm up")  # model load / index build
+            load = time.perf_counter() - start
+            m = evaluate(db, queries)
+            print(f"{backend:<10}{load:9.1f}{m['hit@1']:8.2f}{m['hit@5']:8.2f}{m['mrr@10']:8.2f}"
+                  f"{m['p50_ms']:9.2f}{m['p95_ms']:9.2f}{m['batch_qps']:11.0f}")
+            if backend == "hybrid":
+                print(f"{'':<10}retrievers skipped for budget/errors: {db.hybrid_skipped}")
+
+
+if __name__ == "__main__":
+    main()
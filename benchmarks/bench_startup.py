@@ -0,0 +1,80 @@
+"""
+Time-to-ready of the procedure index: building it from the catalog at
+startup (embed + index) versus opening a prebuilt index snapshot. "Ready"
+means the database is constructed, the catalog is searchable and the first
+query has returned. Each startup runs in a fresh persist directory with a
+cold embedding cache; the snapshot is built once up front and not timed.
+
+Run from the repo root:
+    python -m benchmarks.bench_startup --providers 2000 --backends chroma hybrid
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.bench_retrieval import synthetic_catalog
+from module.index_snapshot import build_snapshot, load_snapshot
+from module.rag_cost_recomm import HealthcareAIAssistant, HealthcareVectorDatabase
+
+QUERY = "I need an MRI for my brain"
+
+
+def fresh_startup(persist_dir: str, backend: str, catalog):
+    timings = {}
+    start = time.perf_counter()
+    db = HealthcareVectorDatabase(persist_dir, retrieval_backend=backend)
+    timings["construct"] = time.perf_counter() - start
+    HealthcareAIAssistant(db).load_sample_data()
+    if catalog:
+        db.add_procedures(catalog)
+    timings["catalog"] = time.perf_counter() - start - timings["construct"]
+    db.search_procedures(QUERY)
+    timings["ready"] = time.perf_counter() - start
+    return timings
+
+
+def snapshot_startup(snapshot: str, persist_dir: str, backend: str, verify: bool):
+    timings = {}
+    start = time.perf_counter()
+    db = load_snapshot(snapshot, persist_directory=persist_dir, retrieval_backend=backend, verify=verify)
+    timings["construct"] = time.perf_counter() - start
+    timings["catalog"] = 0.0
+    db.search_procedures(QUERY)
+    timings["ready"] = time.perf_counter() - start
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--providers", type=int, default=0,
+                        help="synthetic providers added to the sample catalog (4 procedures each)")
+    parser.add_argument("--backends", nargs="+", default=["chroma", "hybrid"])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    # A disk embedding cache would turn every fresh startup after the first into a warm one
+    os.environ.pop("EMBEDDING_CACHE_PATH", None)
+
+    catalog = synthetic_catalog(args.providers, random.Random(args.seed)) if args.providers else []
+    with tempfile.TemporaryDirectory() as workdir:
+        snapshot = os.path.join(workdir, "snapshot")
+        start = time.perf_counter()
+        manifest = build_snapshot(snapshot, procedures=catalog)
+        print(f"snapshot {manifest['version']}: {manifest['procedures']} procedures, "
+              f"built in {time.perf_counter() - start:.1f}s")
+        print(f"{'backend':<9}{'startup':<20}{'construct s':>12}{'catalog s':>11}{'ready s':>9}")
+        for backend in args.backends:
+            runs = [
+                ("fresh", lambda d: fresh_startup(d, backend, catalog)),
+                ("snapshot", lambda d: snapshot_startup(snapshot, d, backend, verify=False)),
+                ("snapshot+verify", lambda d: snapshot_startup(snapshot, d, backend, verify=True)),
+            ]
+            for label, run in runs:
+                with tempfile.TemporaryDirectory(dir=workdir) as persist_dir:
+                    t = run(os.path.join(persist_dir, "db"))
+                print(f"{backend:<9}{label:<20}{t['construct']:12.2f}{t['catalog']:11.2f}{t['ready']:9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+# Process-level cache of CMS chunks with background TTL refresh
+import bisect
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Separator used to join chunk texts into one searchable string; never
+# produced by the CMS text template, so a match cannot span two chunks.
+_SEP = "\x00"
+
+
+def _default_loader() -> List[Dict]:
+    from .cms_ingestion import ingest_pipeline
+    return ingest_pipeline()
+
+
+@dataclass(frozen=True)
+class CMSSnapshot:
+    """Immutable view of the chunk store; swapped in as a whole on refresh."""
+    chunks: tuple = ()
+    haystack: str = ""
+    offsets: List[int] = field(default_factory=list)
+    loaded_at: float = 0.0
+
+    @classmethod
+    def build(cls, chunks: List[Dict]) -> "CMSSnapshot":
+        offsets = []
+        texts = []
+        pos = 0
+        for chunk in chunks:
+            text = str(chunk.get("text", "")).lower().replace(_SEP, " ")
+            offsets.append(pos)
+            texts.append(text)
+            pos += len(text) + len(_SEP)
+        return cls(tuple(chunks), _SEP.join(texts), offsets, time.time())
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Dict]:
+        """Return chunks whose text contains `query` (case-insensitive)."""
+        q = query.lower()
+        if not q or _SEP in q or not self.chunks:
+            return []
+        results = []
+        last = -1
+        start = self.haystack.find(q)
+        while start != -1:
+            idx = bisect.bisect_right(self.offsets, start) - 1
+            if idx != last:
+                results.append(self.chunks[idx])
+                last = idx
+                if limit is not None and len(results) >= limit:
+                    break
+            # Skip to the next chunk once this one has matched
+            next_start = self.offsets[idx + 1] if idx + 1 < len(self.offsets) else len(self.haystack)
+            start = self.haystack.find(q, next_start)
+        return results
+
+
+class CMSChunkStore:
+    """
+    Holds the CMS chunks in memory and refreshes them on a background thread.
+    Readers always see a complete snapshot and never wait on the network; a
+    failed or empty refresh keeps the previous snapshot and is retried after
+    `retry_seconds`, doubling up to the TTL, instead of waiting a full TTL.
+    """
+
+    def __init__(self, loader: Optional[Callable[[], List[Dict]]] = None,
+                 ttl_seconds: Optional[float] = None,
+                 retry_seconds: Optional[float] = None):
+        self._loader = loader or _default_loader
+        if ttl_seconds is None:
+            ttl_seconds = float(os.getenv("CMS_CHUNK_TTL_SECONDS", "3600"))
+        if retry_seconds is None:
+            retry_seconds = float(os.getenv("CMS_CHUNK_RETRY_SECONDS", "30"))
+        self.ttl_seconds = ttl_seconds
+        self.retry_seconds = min(retry_seconds, ttl_seconds)
+        self._snapshot = CMSSnapshot()
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def snapshot(self) -> CMSSnapshot:
+        return self._snapshot
+
+    def refresh(self) -> bool:
+        """Load chunks synchronously and swap the snapshot. Returns True on swap."""
+        if not self._refresh_lock.acquire(blocking=False):
+            return False  # another refresh is already running
+        try:
+            try:
+                chunks = self._loader()
+            except Exception as e:
+                logger.warning(f"CMS chunk refresh failed: {e}")
+                return False
+            if not chunks and self._snapshot.chunks:
+                logger.warning("CMS chunk refresh returned no data; keeping previous snapshot")
+                return False
+            self._snapshot = CMSSnapshot.build(list(chunks or []))
+            logger.info(f"CMS chunk store refreshed with {len(self._snapshot.chunks)} chunks")
+            return True
+        finally:
+            self._refresh_lock.release()
+
+    def _run(self):
+        delay = self.retry_seconds
+        while not self._stop.is_set():
+            if self.refresh() and self._snapshot.chunks:
+                delay = self.retry_seconds
+                wait = self.ttl_seconds
+            else:
+                # Failed or still empty: back off, but don't wait out the TTL
+                wait = delay
+                delay = min(delay * 2, self.ttl_seconds)
+            self._stop.wait(wait)
+
+    def start(self):
+        """Start the background refresh thread (idempotent)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="cms-chunk-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Dict]:
+        return self._snapshot.search(query, limit)
+
+
+_store: Optional[CMSChunkStore] = None
+_store_lock = threading.Lock()
+
+
+def get_cms_chunk_store() -> CMSChunkStore:
+    """Return the process-wide chunk store, starting its refresh thread on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                store = CMSChunkStore()
+                store.start()
+                _store = store
+    return _store
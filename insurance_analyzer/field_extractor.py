@@ -0,0 +1,230 @@
+import re
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Tuple
+
+# Field spec: (field key, label as printed on cards, value pattern after the label).
+# Matching is case-insensitive; the first occurrence in the text wins.
+FIELD_SPECS: List[Tuple[str, str, str]] = [
+    ("subscriber_name", "Subscriber Name", r"[:\s]*([A-Za-z .]+)"),
+    ("subscriber_id", "Subscriber ID", r"[:\s]*([A-Z0-9]+)"),
+    ("group_no", "Group No", r"[:\s]*([0-9]+)"),
+    ("rxbin_group", "RxBin/Group", r"[:\s]*([0-9A-Z ]+)"),
+    ("date_issued", "Date Issued", r"[:\s]*([0-9/]+)"),
+    ("primary", "Primary", r"[:\s]*\$?([0-9]+)"),
+    ("specialist", "Specialist", r"[:\s]*\$?([0-9]+)"),
+    ("urgent_care", "Urgent Care", r"[:\s]*\$?([0-9]+)"),
+    ("er", "ER", r"[:\s]*\$?([0-9]+)"),
+    ("prescription_drug", "Prescription Drug", r"[:\s]*([\$0-9/ %\-]+)"),
+    ("preventive_care", "Preventive Care", r"[:\s]*([A-Za-z ]+)"),
+    ("copay", "Copay", r"[:\s]*\$?([0-9]+)"),
+    ("deductible", "Deductible", r"[:\s]*\$?([0-9]+)"),
+]
+
+# Amount-first / label-first forms ("$25 Copay", "No Deductible", "Copay: $25");
+# these override the spec value for the same key.
+AMOUNT_FIELDS = ["copay", "deductible"]
+
+# Character classes of the generic sweeps
+_ALPHA_SPACE_RUN = re.compile(r"[A-Za-z ]+")
+_DOLLAR_SEP = re.compile(r"[:\s\-]*")
+_DOLLAR_AMOUNT = re.compile(r"\$([0-9]+(?:/[0-9]+)*%?)")
+_KV_LABEL_START = re.compile(r"[A-Za-z][A-Za-z0-9 /-]")
+_KV_LABEL_RUN = re.compile(r"[A-Za-z0-9 /-]+")
+_KV_SEP_RUN = re.compile(r"[:\s]+")
+_KV_VALUE_RUN = re.compile(r"[A-Za-z0-9$%/., -]+")
+_KV_NEXT_LABEL = re.compile(r"(?= [A-Z][a-zA-Z]+:)")
+
+
+class _Runs:
+    """Spans of one character class, for O(log n) "where does this run end" lookups."""
+
+    def __init__(self, pattern: re.Pattern, text: str):
+        self.starts = []
+        self.ends = []
+        for m in pattern.finditer(text):
+            self.starts.append(m.start())
+            self.ends.append(m.end())
+
+    def index(self, pos: int) -> int:
+        """Index of the run containing `pos`, or -1."""
+        i = bisect_right(self.starts, pos) - 1
+        return i if i >= 0 and self.ends[i] > pos else -1
+
+    def end(self, pos: int) -> int:
+        """End of the run containing `pos` (`pos` itself if outside any run)."""
+        i = self.index(pos)
+        return self.ends[i] if i >= 0 else pos
+
+
+def dollar_pairs(text: str) -> List[Tuple[str, str]]:
+    """
+    Linear-time equivalent of
+    re.findall(r'([A-Za-z ]+?)[:\\s\\-]+\\$([0-9]+(?:/[0-9]+)*(?:%|))', text).
+    A label is a run of letters/spaces; the lazy label ends where only
+    separators remain before "$<digits>", so each run is examined once.
+    """
+    pairs = []
+    pos = 0
+    while True:
+        run = _ALPHA_SPACE_RUN.search(text, pos)
+        if run is None:
+            return pairs
+        start, end = run.start(), run.end()
+        # Trailing spaces of the run also count as separators
+        label_end = max(start + 1, start + len(run.group().rstrip(" ")))
+        sep_end = _DOLLAR_SEP.match(text, end).end()
+        amount = _DOLLAR_AMOUNT.match(text, sep_end)
+        if amount is not None and sep_end > label_end:
+            pairs.append((text[start:label_end], amount.group(1)))
+            pos = amount.end()
+        else:
+            pos = end
+
+
+def key_value_pairs(text: str) -> List[Tuple[str, str]]:
+    """
+    Linear-time equivalent of
+    re.findall(r'([A-Za-z][A-Za-z0-9 /-]+)[:\\s]+([A-Za-z0-9$%/., -]+?)(?= [A-Z][a-zA-Z]+:|$)', text).
+
+    The regex tries label ends right-to-left, separator ends right-to-left and
+    value ends left-to-right. Whether a given separator end `f` can start a
+    value only depends on `f`, and whether a label end `j` succeeds only on the
+    separator run it starts, so both are memoized per run and every candidate
+    is examined a bounded number of times instead of once per start position.
+    """
+    n = len(text)
+    label_runs = _Runs(_KV_LABEL_RUN, text)
+    sep_runs = _Runs(_KV_SEP_RUN, text)
+    value_runs = _Runs(_KV_VALUE_RUN, text)
+    # Positions where the lookahead holds: before " Xxx:" or at the end ($)
+    stops = [m.start() for m in _KV_NEXT_LABEL.finditer(text)]
+    if text.endswith("\n"):
+        stops.append(n - 1)
+    stops.append(n)
+    stops.sort()
+
+    def next_stop(pos: int) -> int:
+        return stops[bisect_left(stops, pos)]
+
+    def value_end(f: int) -> Optional[int]:
+        if f >= n:
+            return None
+        v = next_stop(f + 1)
+        return v if v <= value_runs.end(f) else None
+
+    best_f: Dict[int, Optional[int]] = {}
+
+    def best_value_start(run: int) -> Optional[int]:
+        # Largest separator end f in (run start, run end] that can start a value
+        if run not in best_f:
+            found = None
+            for f in range(sep_runs.ends[run], sep_runs.starts[run], -1):
+                if value_end(f) is not None:
+                    found = f
+                    break
+            best_f[run] = found
+        return best_f[run]
+
+    best_j: Dict[int, Optional[int]] = {}
+
+    def best_label_end(label_start: int, label_max: int) -> Optional[int]:
+        # Largest label end j <= label_max (j > label_start + 1) followed by a working separator
+        if label_max not in best_j:
+            found = None
+            i = bisect_right(sep_runs.starts, label_max) - 1
+            while i >= 0 and sep_runs.ends[i] > label_start + 2:
+                f = best_value_start(i)
+                if f is not None:
+                    j = min(f - 1, label_max)
+                    if j >= sep_runs.starts[i]:
+                        found = j
+                        break
+                i -= 1
+            best_j[label_max] = found
+        return best_j[label_max]
+
+    pairs = []
+    pos = 0
+    while True:
+        m = _KV_LABEL_START.search(text, pos)
+        if m is None:
+            return pairs
+        s = m.start()
+        label_max = label_runs.end(s + 1)
+        j = best_label_end(label_runs.starts[label_runs.index(s)], label_max)
+        if j is None or j < s + 2:
+            # Every later start in this label run has a subset of the same choices
+            pos = label_max
+            continue
+        f = best_value_start(sep_runs.index(j))
+        v = value_end(f)
+        pairs.append((text[s:j], text[f:v]))
+        pos = v
+
+
+class FieldExtractor:
+    """
+    Precompiled, data-driven card field extractor. All spec labels are found
+    in one scan of the text; each label occurrence is checked only against
+    the specs it can start, and the scan stops once every field is found.
+    """
+
+    def __init__(self, specs: List[Tuple[str, str, str]] = FIELD_SPECS):
+        self.specs = specs
+        self._patterns = {key: re.compile(re.escape(label) + value, re.IGNORECASE)
+                          for key, label, value in specs}
+        labels = sorted({label for _, label, _ in specs}, key=len, reverse=True)
+        self._label_scan = re.compile(
+            "(?=(" + "|".join(re.escape(label) for label in labels) + "))", re.IGNORECASE
+        )
+        self._by_label: Dict[str, List[str]] = {}
+        for key, label, _ in specs:
+            self._by_label.setdefault(label.lower(), []).append(key)
+        self._amount_first = {
+            key: re.compile(rf"(\$\d+|No)[\s\n\r\t\-:]*{key}", re.IGNORECASE | re.MULTILINE)
+            for key in AMOUNT_FIELDS
+        }
+        self._label_first = {
+            key: re.compile(rf"{key}[\s\n\r\t\-:]*([\$\d]+|No)", re.IGNORECASE | re.MULTILINE)
+            for key in AMOUNT_FIELDS
+        }
+
+    def _spec_fields(self, text: str) -> Dict[str, str]:
+        found: Dict[str, str] = {}
+        remaining = len(self._patterns)
+        for m in self._label_scan.finditer(text):
+            pos = m.start()
+            for key in self._by_label[m.group(1).lower()]:
+                if key in found:
+                    continue
+                match = self._patterns[key].match(text, pos)
+                if match:
+                    found[key] = match.group(1).strip()
+                    remaining -= 1
+            if not remaining:
+                break
+        # Keep spec order, like one search per spec would
+        return {key: found[key] for key, _, _ in self.specs if key in found}
+
+    def extract(self, text: str) -> Dict[str, str]:
+        fields = self._spec_fields(text)
+
+        for key in AMOUNT_FIELDS:
+            match = self._amount_first[key].search(text) or self._label_first[key].search(text)
+            if match:
+                val = match.group(1)
+                fields[key] = val if val.lower() != 'no' else '0'
+
+        for label, value in dollar_pairs(text):
+            label_key = label.strip().lower().replace(' ', '_')
+            if label_key not in fields:
+                fields[label_key] = value.strip()
+
+        for label, value in key_value_pairs(text):
+            label_key = label.strip().lower().replace(' ', '_').replace('-', '_')
+            if label_key not in fields and len(value.strip()) > 0:
+                fields[label_key] = value.strip()
+        return fields
+
+
+default_extractor = FieldExtractor()
@@ -1,81 +1,53 @@
-import pytesseract
 import cv2
-import re
-from typing import Dict
-
-# Example function to extract text from image using pytesseract
+import numpy as np
+from typing import Dict, Optional
+from .field_extractor import default_extractor
+from .ocr_backend import image_to_string
+from .preprocess import PreprocessConfig, preprocess
+
+# Example function to extract text from image with the OCR backend
+
+def _ocr_image(image, config: Optional[PreprocessConfig] = None) -> str:
+    # Crop to the card, scale to the target text height and threshold
+    thresh = preprocess(image, config)
+    text = image_to_string(thresh)
+    # Clean up text
+    text = text.replace('\n', ' ').replace('\r', ' ').strip()
+    return text
 
 def extract_text_from_image(image_path: str) -> str:
     image = cv2.imread(image_path)
     if image is None:
         raise ValueError(f"Could not read image: {image_path}")
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    # Resize for better OCR (optional, adjust as needed)
-    gray = cv2.resize(gray, None, fx=2, fy=2, interpolation=cv2.INTER_CUBIC)
-    # Apply thresholding
-    _, thresh = cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY)
-    text = pytesseract.image_to_string(thresh)
-    # Clean up text
-    text = text.replace('\n', ' ').replace('\r', ' ').strip()
-    return text
+    return _ocr_image(image)
+
+def is_pdf_bytes(data: bytes) -> bool:
+    return data[:5] == b"%PDF-"
+
+def decode_image_bytes(data: bytes):
+    """Decode an uploaded image straight from its buffer (no temp file)."""
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Could not decode image bytes")
+    return image
+
+def pdf_bytes_to_images(data: bytes, dpi: int = 200):
+    """Rasterize an in-memory PDF into BGR arrays, one per page."""
+    from pdf2image import convert_from_bytes
+    return [cv2.cvtColor(np.asarray(page.convert("RGB")), cv2.COLOR_RGB2BGR)
+            for page in convert_from_bytes(data, dpi=dpi)]
+
+def extract_text_from_bytes(data: bytes) -> str:
+    """OCR an uploaded image or PDF held in memory."""
+    if is_pdf_bytes(data):
+        return " ".join(_ocr_image(page) for page in pdf_bytes_to_images(data))
+    return _ocr_image(decode_image_bytes(data))
 
 # Example function to extract insurance fields from OCR text
 
 def extract_insurance_fields(text: str) -> Dict[str, str]:
-    fields = {}
-    
-    # Extract common insurance fields
-    patterns = {
-        "subscriber_name": r"Subscriber Name[:\s]*([A-Za-z .]+)",
-        "subscriber_id": r"Subscriber ID[:\s]*([A-Z0-9]+)",
-        "group_no": r"Group No[:\s]*([0-9]+)",
-        "rxbin_group": r"RxBin/Group[:\s]*([0-9A-Z ]+)",
-        "date_issued": r"Date Issued[:\s]*([0-9/]+)",
-        "primary": r"Primary[:\s]*\$?([0-9]+)",
-        "specialist": r"Specialist[:\s]*\$?([0-9]+)",
-        "urgent_care": r"Urgent Care[:\s]*\$?([0-9]+)",
-        "er": r"ER[:\s]*\$?([0-9]+)",
-        "prescription_drug": r"Prescription Drug[:\s]*([\$0-9/ %\-]+)",
-        "preventive_care": r"Preventive Care[:\s]*([A-Za-z ]+)",
-        # Add copay and deductible patterns
-        "copay": r"Copay[:\s]*\$?([0-9]+)",
-        "deductible": r"Deductible[:\s]*\$?([0-9]+)",
-    }
-    for key, pat in patterns.items():
-        match = re.search(pat, text, re.IGNORECASE)
-        if match:
-            fields[key] = match.group(1).strip()
-
-    # Robust extraction for copay and deductible (handles line breaks, whitespace, end-of-line)
-    copay_match = re.search(r'(\$\d+|No)[\s\n\r\t\-:]*Copay', text, re.IGNORECASE | re.MULTILINE)
-    if not copay_match:
-        copay_match = re.search(r'Copay[\s\n\r\t\-:]*([\$\d]+|No)', text, re.IGNORECASE | re.MULTILINE)
-    if copay_match:
-        val = copay_match.group(1)
-        fields['copay'] = val if val.lower() != 'no' else '0'
-
-    # Enhanced deductible extraction: match 'No Deductible', '$X Deductible', with any whitespace, line breaks, or OCR quirks
-    deductible_match = re.search(r'(\$\d+|No)[\s\n\r\t\-:]*Deductible', text, re.IGNORECASE | re.MULTILINE)
-    if not deductible_match:
-        deductible_match = re.search(r'Deductible[\s\n\r\t\-:]*([\$\d]+|No)', text, re.IGNORECASE | re.MULTILINE)
-    if deductible_match:
-        val = deductible_match.group(1)
-        fields['deductible'] = val if val.lower() != 'no' else '0'
-
-    # Generic extraction for all $-amounts and copay/deductible-like fields
-    dollar_fields = re.findall(r'([A-Za-z ]+?)[:\s\-]+\$([0-9]+(?:/[0-9]+)*(?:%|))', text)
-    for label, value in dollar_fields:
-        label_key = label.strip().lower().replace(' ', '_')
-        if label_key not in fields:
-            fields[label_key] = value.strip()
-
-    # Try to extract all key-value pairs (label: value)
-    key_value_pairs = re.findall(r'([A-Za-z][A-Za-z0-9 /-]+)[:\s]+([A-Za-z0-9$%/., -]+?)(?= [A-Z][a-zA-Z]+:|$)', text)
-    for label, value in key_value_pairs:
-        label_key = label.strip().lower().replace(' ', '_').replace('-', '_')
-        if label_key not in fields and len(value.strip()) > 0:
-            fields[label_key] = value.strip()
-    return fields
+    # Single pass over the field spec labels plus linear-time generic sweeps
+    return default_extractor.extract(text)
 
 # Main function to run OCR and extract fields
 
@@ -145,7 +117,13 @@ def format_insurance_data(cleaned: Dict[str, str]) -> str:
     return html
 
 def analyze_insurance_card(image_path: str) -> dict:
-    text = extract_text_from_image(image_path)
+    return analyze_insurance_text(extract_text_from_image(image_path))
+
+def analyze_insurance_card_bytes(data: bytes) -> dict:
+    """Same as analyze_insurance_card, for an upload buffer (image or PDF)."""
+    return analyze_insurance_text(extract_text_from_bytes(data))
+
+def analyze_insurance_text(text: str) -> dict:
     fields = extract_insurance_fields(text)
 
     # Remove raw_text and null-like entries
@@ -0,0 +1,127 @@
+import atexit
+import logging
+import os
+import threading
+from typing import Optional
+
+import numpy as np
+from PIL import Image
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+logger = logging.getLogger(__name__)
+
+
+def _to_pil(image) -> Image.Image:
+    if isinstance(image, Image.Image):
+        return image
+    if image.ndim == 3:
+        # OpenCV arrays are BGR
+        image = np.ascontiguousarray(image[:, :, ::-1])
+    return Image.fromarray(image)
+
+
+class PytesseractBackend:
+    """Runs the tesseract CLI once per image (model load + temp files every call)."""
+
+    name = "pytesseract"
+
+    def __init__(self, lang: str = "eng"):
+        import pytesseract
+        self._pytesseract = pytesseract
+        self.lang = lang
+
+    def image_to_string(self, image) -> str:
+        return self._pytesseract.image_to_string(_to_pil(image), lang=self.lang)
+
+    def warm(self):
+        pass
+
+
+class TesserocrBackend:
+    """
+    Keeps one initialized Tesseract engine per thread through the tesserocr C
+    API, so the language model is loaded once per worker rather than once per
+    image. Engines are not thread-safe, hence one per thread.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self, lang: str = "eng"):
+        self.lang = lang
+        self._local = threading.local()
+        self._engines = []
+        self._lock = threading.Lock()
+        # Fail here (not on the first card) if the language data is missing
+        self._engine()
+        atexit.register(self.close)
+
+    def _engine(self):
+        api = getattr(self._local, "api", None)
+        if api is None:
+            api = tesserocr.PyTessBaseAPI(lang=self.lang)
+            self._local.api = api
+            with self._lock:
+                self._engines.append(api)
+        return api
+
+    def image_to_string(self, image) -> str:
+        api = self._engine()
+        api.SetImage(_to_pil(image))
+        try:
+            return api.GetUTF8Text()
+        finally:
+            api.Clear()
+
+    def warm(self):
+        self._engine()
+
+    def close(self):
+        with self._lock:
+            engines, self._engines = self._engines, []
+        for api in engines:
+            api.End()
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def create_backend(name: Optional[str] = None, lang: Optional[str] = None):
+    """
+    OCR_BACKEND=auto (default) uses tesserocr when it is installed and falls
+    back to pytesseract; "tesserocr" or "pytesseract" force one.
+    """
+    name = name or os.getenv("OCR_BACKEND", "auto")
+    lang = lang or os.getenv("OCR_LANG", "eng")
+    if name not in ("auto", "tesserocr", "pytesseract"):
+        raise ValueError(f"Unknown OCR backend: {name}")
+    if name != "pytesseract" and tesserocr is not None:
+        try:
+            return TesserocrBackend(lang)
+        except RuntimeError as e:
+            if name == "tesserocr":
+                raise
+            logger.warning(f"tesserocr unavailable ({e}); falling back to pytesseract")
+    elif name == "tesserocr":
+        raise RuntimeError("OCR_BACKEND=tesserocr but tesserocr is not installed")
+    return PytesseractBackend(lang)
+
+
+def get_backend():
+    """The process-wide OCR backend (each worker process gets its own)."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend()
+                logger.info(f"Using {_backend.name} OCR backend")
+    return _backend
+
+
+def image_to_string(image) -> str:
+    """OCR a PIL image or OpenCV array with the process-wide backend."""
+    return get_backend().image_to_string(image)
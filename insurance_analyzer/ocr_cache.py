@@ -0,0 +1,95 @@
+import copy
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class OCRResultCache:
+    """
+    Caches card analysis results by the SHA-256 of the uploaded bytes, so
+    only a byte-identical upload gets a cached result. Holds at most
+    `max_entries` results (LRU).
+
+    With `persist_dir` set, results are also written as JSON files and
+    reloaded on startup. Those files hold the extracted card fields
+    (member names, subscriber and group IDs) in plaintext. They are created
+    owner-only (0600 in a 0700 directory), but the directory should still
+    live on encrypted storage that only the service can read.
+    """
+
+    def __init__(self, max_entries: int = 512, persist_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.persist_dir = persist_dir
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if persist_dir:
+            os.makedirs(persist_dir, mode=0o700, exist_ok=True)
+            os.chmod(persist_dir, 0o700)
+            self._load()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.persist_dir, f"{key}.json")
+
+    def _load(self):
+        files = [f for f in os.listdir(self.persist_dir) if f.endswith(".json")]
+        files.sort(key=lambda f: os.path.getmtime(os.path.join(self.persist_dir, f)))
+        for name in files[-self.max_entries:]:
+            try:
+                with open(os.path.join(self.persist_dir, name), encoding="utf-8") as f:
+                    entry = json.load(f)
+                self._entries[name[:-len(".json")]] = entry
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping unreadable OCR cache file {name}: {e}")
+        logger.info(f"Loaded {len(self._entries)} cached OCR results from {self.persist_dir}")
+
+    def lookup(self, key: str) -> Optional[dict]:
+        """Cached result for this content hash, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry["result"])
+
+    def store(self, key: str, result: dict):
+        entry = {"result": copy.deepcopy(result)}
+        evicted = []
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False)[0])
+        if self.persist_dir:
+            try:
+                fd = os.open(self._path(key), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(entry, f)
+                for old_key in evicted:
+                    if os.path.exists(self._path(old_key)):
+                        os.remove(self._path(old_key))
+            except OSError as e:
+                logger.warning(f"Could not persist OCR cache entry: {e}")
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
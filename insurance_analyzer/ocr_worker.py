@@ -0,0 +1,16 @@
+# Entry points run inside the OCR worker processes. Spawned workers import this
+# module to unpickle them, so it must stay free of API-process state such as
+# the OCR result cache.
+from insurance_analyzer import insurance_ocr
+
+
+def extract_insurance_info(file_bytes: bytes) -> dict:
+    """Extract insurance info from an uploaded image or PDF, decoded in memory"""
+    return insurance_ocr.analyze_insurance_card_bytes(file_bytes)
+
+
+def warm_worker():
+    # Import the OCR stack and load the Tesseract model once per worker instead of on the first job
+    import cv2  # noqa: F401
+    from insurance_analyzer.ocr_backend import get_backend
+    get_backend().warm()
@@ -0,0 +1,125 @@
+import atexit
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterator, Optional, Tuple, Union
+
+from pdf2image import convert_from_bytes, convert_from_path, pdfinfo_from_bytes, pdfinfo_from_path
+
+from .ocr_backend import image_to_string
+
+# A PDF on disk (path) or an upload held in memory (bytes)
+PdfSource = Union[str, bytes]
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _pool_workers() -> int:
+    return int(os.getenv("PDF_OCR_WORKERS", str(os.cpu_count() or 1)))
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Process-wide page OCR pool, spawned on the first multi-page PDF and reused after."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn: the API process runs background threads, which fork does not copy safely
+                _pool = ProcessPoolExecutor(max_workers=_pool_workers(),
+                                            mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+@atexit.register
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def pdf_page_count(source: PdfSource) -> int:
+    info = pdfinfo_from_bytes(source) if isinstance(source, bytes) else pdfinfo_from_path(source)
+    return int(info["Pages"])
+
+
+def ocr_pdf_page(source: PdfSource, page: int, dpi: int = 200) -> Tuple[int, str]:
+    """Rasterize and OCR a single page; only this page is ever held in memory."""
+    convert = convert_from_bytes if isinstance(source, bytes) else convert_from_path
+    images = convert(source, dpi=dpi, first_page=page, last_page=page)
+    return page, "\n".join(image_to_string(img) for img in images)
+
+
+def iter_pdf_text(source: PdfSource, dpi: int = 200, first_page: int = 1,
+                  last_page: Optional[int] = None, workers: Optional[int] = None) -> Iterator[Tuple[int, str]]:
+    """
+    Yield (page number, text) for the requested page range as pages finish.
+    `source` is a file path or the PDF's bytes. Single-page documents are
+    OCRed inline; longer ones are spread over the shared worker pool, with
+    pages rasterized lazily inside the workers and at most two pages per
+    worker in flight, so memory stays bounded however long the PDF is.
+    Bytes are spooled once to a private (0600) temporary file, removed when
+    iteration ends, and workers are handed its path rather than the PDF.
+    Results arrive in completion order; sort by page number if order matters.
+    """
+    if isinstance(source, bytes):
+        # Otherwise every page task would pickle the whole PDF to a worker, and
+        # pdf2image would write it to yet another temporary file per page
+        fd, path = tempfile.mkstemp(suffix=".pdf")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(source)
+            yield from iter_pdf_text(path, dpi, first_page, last_page, workers)
+        finally:
+            os.remove(path)
+        return
+
+    if last_page is None:
+        last_page = pdf_page_count(source)
+    pages = iter(range(first_page, last_page + 1))
+    workers = max(1, min(workers or _pool_workers(), last_page - first_page + 1))
+    if workers == 1:
+        # Not worth a round trip through the pool (or spawning it)
+        for page in pages:
+            yield ocr_pdf_page(source, page, dpi)
+        return
+
+    pool = _get_pool()
+    pending = set()
+    try:
+        for page in pages:
+            pending.add(pool.submit(ocr_pdf_page, source, page, dpi))
+            if len(pending) >= workers * 2:
+                break
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+                page = next(pages, None)
+                if page is not None:
+                    pending.add(pool.submit(ocr_pdf_page, source, page, dpi))
+    except BrokenProcessPool:
+        # A worker died; start a fresh pool for the next document
+        _discard_pool(pool)
+        raise
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def extract_pdf_text(source: PdfSource, **kwargs) -> str:
+    """Full text of the PDF in page order (see iter_pdf_text for options)."""
+    return "\n".join(text for _, text in sorted(iter_pdf_text(source, **kwargs)))
@@ -0,0 +1,199 @@
+import os
+import time
+from dataclasses import dataclass, replace
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+THRESHOLDS = ("fixed", "otsu", "adaptive")
+
+
+@dataclass(frozen=True)
+class PreprocessConfig:
+    """
+    How a card image is prepared for Tesseract. With `scale` unset the image
+    is resized so the median glyph is `target_text_height` pixels tall (the
+    range Tesseract is most accurate in), instead of blindly upsampling
+    phone photos that are already several thousand pixels wide.
+    """
+    target_text_height: int = 32
+    scale: Optional[float] = None         # fixed resize factor, overrides target_text_height
+    min_scale: float = 0.25
+    max_scale: float = 4.0
+    crop_card: bool = True
+    threshold: str = "otsu"               # one of THRESHOLDS
+    fixed_threshold: int = 150
+    adaptive_block_size: int = 31
+    adaptive_c: int = 10
+    analysis_side: int = 1200             # longest side of the copy used for detection
+
+    def __post_init__(self):
+        if self.threshold not in THRESHOLDS:
+            raise ValueError(f"threshold must be one of {THRESHOLDS}, got {self.threshold!r}")
+
+    @classmethod
+    def from_env(cls) -> "PreprocessConfig":
+        """
+        LEGACY_CONFIG unless OCR_PREPROCESS=auto selects the crop + target
+        text height pipeline. The legacy pipeline stays the default until
+        bench_ocr_preprocess has accuracy numbers from a tesseract run.
+        OCR_TEXT_HEIGHT, OCR_SCALE, OCR_CROP_CARD and OCR_THRESHOLD override
+        either base.
+        """
+        base = cls() if os.getenv("OCR_PREPROCESS", "legacy") == "auto" else LEGACY_CONFIG
+        overrides = {}
+        if os.getenv("OCR_TEXT_HEIGHT"):
+            overrides["target_text_height"] = int(os.environ["OCR_TEXT_HEIGHT"])
+        if os.getenv("OCR_SCALE"):
+            overrides["scale"] = float(os.environ["OCR_SCALE"])
+        if os.getenv("OCR_CROP_CARD"):
+            overrides["crop_card"] = os.environ["OCR_CROP_CARD"] == "1"
+        if os.getenv("OCR_THRESHOLD"):
+            overrides["threshold"] = os.environ["OCR_THRESHOLD"]
+        return replace(base, **overrides)
+
+
+# The original pipeline: 2x cubic upsample and a fixed threshold, full frame
+LEGACY_CONFIG = PreprocessConfig(scale=2.0, crop_card=False, threshold="fixed")
+
+
+def _analysis_copy(gray: np.ndarray, side: int):
+    """Downscaled copy for detection, and the factor that maps back to `gray`."""
+    factor = min(1.0, side / max(gray.shape[:2]))
+    if factor == 1.0:
+        return gray, 1.0
+    small = cv2.resize(gray, None, fx=factor, fy=factor, interpolation=cv2.INTER_AREA)
+    return small, factor
+
+
+def detect_card(gray: np.ndarray, side: int = 1200, min_area: float = 0.02,
+                aspect_range: Tuple[float, float] = (1.2, 2.2), min_fill: float = 0.85):
+    """
+    Bounding box (x, y, w, h) of the largest card-like outline, or None when
+    there is none (e.g. a scan that is already cropped). A candidate covers
+    at least `min_area` of the frame, has a card's aspect ratio in either
+    orientation, and fills at least `min_fill` of its rotated bounding
+    rectangle, so rounded corners are accepted where a strict four-vertex
+    polygon test would reject them.
+    """
+    small, factor = _analysis_copy(gray, side)
+    edges = cv2.Canny(cv2.GaussianBlur(small, (5, 5), 0), 30, 90)
+    edges = cv2.dilate(edges, np.ones((3, 3), np.uint8))
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    frame_area = small.shape[0] * small.shape[1]
+    best = None
+    for contour in contours:
+        area = cv2.contourArea(contour)
+        if area < min_area * frame_area or (best is not None and area <= best[0]):
+            continue
+        (_, _), (rw, rh), _ = cv2.minAreaRect(contour)
+        if min(rw, rh) == 0:
+            continue
+        aspect = max(rw, rh) / min(rw, rh)
+        if aspect_range[0] <= aspect <= aspect_range[1] and area >= min_fill * rw * rh:
+            best = (area, cv2.boundingRect(contour))
+    box = best[1] if best is not None else _content_box(small, min_area)
+    if box is None:
+        return None
+    x, y, w, h = box
+    if w * h >= 0.95 * frame_area:
+        return None
+    return tuple(int(round(v / factor)) for v in (x, y, w, h))
+
+
+def _content_box(small: np.ndarray, min_area: float, merge: int = 15):
+    """
+    Bounding box of the largest non-background region when the frame has a
+    plain margin (scans and screenshots of a card on a white page), for
+    cards with no visible outline. None for textured backgrounds (photos).
+    """
+    border = np.concatenate([small[0], small[-1], small[:, 0], small[:, -1]]).astype(np.float32)
+    if border.std() > 12:
+        return None
+    background = np.median(border)
+    mask = (np.abs(small.astype(np.int16) - background) > 24).astype(np.uint8)
+    # Merge the card's text and graphics into one blob; isolated specks stay small
+    mask = cv2.dilate(mask, np.ones((merge, merge), np.uint8))
+    count, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+    if count <= 1:
+        return None
+    largest = 1 + int(np.argmax(stats[1:, cv2.CC_STAT_AREA]))
+    x, y, w, h = stats[largest, :4]
+    pad = merge // 2
+    x, y = x + pad, y + pad
+    w, h = w - 2 * pad, h - 2 * pad
+    if w <= 0 or h <= 0 or w * h < min_area * small.shape[0] * small.shape[1]:
+        return None
+    return int(x), int(y), int(w), int(h)
+
+
+def estimate_text_height(gray: np.ndarray, side: int = 1200) -> Optional[float]:
+    """Median glyph height in pixels of `gray`, from connected components of an Otsu binarization."""
+    small, factor = _analysis_copy(gray, side)
+    _, binary = cv2.threshold(small, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    count, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+    if count <= 1:
+        return None
+    widths = stats[1:, cv2.CC_STAT_WIDTH]
+    heights = stats[1:, cv2.CC_STAT_HEIGHT]
+    areas = stats[1:, cv2.CC_STAT_AREA]
+    # Glyph-like: not specks, not rules/borders, not huge blobs
+    glyphs = (heights >= 4) & (heights <= small.shape[0] * 0.2) & (widths <= heights * 3) & (areas >= 8)
+    if glyphs.sum() < 5:
+        return None
+    return float(np.median(heights[glyphs])) / factor
+
+
+def _threshold(gray: np.ndarray, config: PreprocessConfig) -> np.ndarray:
+    if config.threshold == "fixed":
+        _, out = cv2.threshold(gray, config.fixed_threshold, 255, cv2.THRESH_BINARY)
+    elif config.threshold == "otsu":
+        _, out = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    else:
+        out = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY,
+                                    config.adaptive_block_size | 1, config.adaptive_c)
+    return out
+
+
+def preprocess(image: np.ndarray, config: Optional[PreprocessConfig] = None,
+               timings: Optional[Dict[str, float]] = None) -> np.ndarray:
+    """
+    Grayscale -> crop to card -> scale to target text height -> threshold.
+    If `timings` is given, the seconds spent in each stage are added to it.
+    """
+    config = config or default_config
+    timings = timings if timings is not None else {}
+
+    def lap(stage: str, started: float) -> float:
+        now = time.perf_counter()
+        timings[stage] = timings.get(stage, 0.0) + now - started
+        return now
+
+    t = time.perf_counter()
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    t = lap("gray", t)
+
+    if config.crop_card:
+        box = detect_card(gray, config.analysis_side)
+        if box is not None:
+            x, y, w, h = box
+            gray = gray[y:y + h, x:x + w]
+    t = lap("crop", t)
+
+    factor = config.scale
+    if factor is None:
+        height = estimate_text_height(gray, config.analysis_side)
+        factor = config.target_text_height / height if height else 1.0
+        factor = min(config.max_scale, max(config.min_scale, factor))
+    if abs(factor - 1.0) > 0.05:
+        interpolation = cv2.INTER_CUBIC if factor > 1 else cv2.INTER_AREA
+        gray = cv2.resize(gray, None, fx=factor, fy=factor, interpolation=interpolation)
+    t = lap("scale", t)
+
+    out = _threshold(gray, config)
+    lap("threshold", t)
+    return out
+
+
+default_config = PreprocessConfig.from_env()
@@ -0,0 +1,126 @@
+# Caching wrapper around a Chroma embedding function for repeated query texts
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+try:
+    from chromadb.api.types import EmbeddingFunction
+except ImportError:  # older/newer chromadb layouts; the protocol only needs __call__(input)
+    EmbeddingFunction = object
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    # The default model (all-MiniLM-L6-v2) is uncased, so case and spacing do not change the vector
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+class CachingEmbeddingFunction(EmbeddingFunction):
+    """
+    Chroma embedding function that memoizes another one. Texts are keyed on
+    their normalized form; the newest `max_entries` vectors are kept in
+    memory (LRU) and, with `persist_path` set, every vector is also stored
+    in a SQLite file so hot queries survive restarts. Only cache misses are
+    sent to the wrapped model, in one batch.
+
+    Bulk document loads should call `embed_uncached` so a catalog load does
+    not flush the query cache.
+    """
+
+    def __init__(self, base: Callable[[List[str]], List], max_entries: int = 4096,
+                 persist_path: Optional[str] = None, model_id: Optional[str] = None,
+                 normalize: Callable[[str], str] = normalize_text):
+        self.base = base
+        self.max_entries = max_entries
+        self.normalize = normalize
+        self.model_id = model_id or type(base).__name__
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._db: Optional[sqlite3.Connection] = None
+        if persist_path:
+            os.makedirs(os.path.dirname(os.path.abspath(persist_path)), exist_ok=True)
+            self._db = sqlite3.connect(persist_path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)")
+            self._db.commit()
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_id}\x00{self.normalize(text)}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _disk_get(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        if self._db is None or not keys:
+            return {}
+        placeholders = ",".join("?" * len(keys))
+        rows = self._db.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", keys)
+        return {key: np.frombuffer(blob, dtype=np.float32) for key, blob in rows}
+
+    def _disk_put(self, items: Dict[str, np.ndarray]):
+        if self._db is None or not items:
+            return
+        try:
+            self._db.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                                 [(key, vector.astype(np.float32).tobytes()) for key, vector in items.items()])
+            self._db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not persist query embeddings: {e}")
+
+    def __call__(self, input: List[str]) -> List[List[float]]:
+        keys = [self._key(text) for text in input]
+        vectors: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for key in keys:
+                vector = self._entries.get(key)
+                if vector is not None:
+                    self._entries.move_to_end(key)
+                    vectors[key] = vector
+            self.hits += sum(1 for key in keys if key in vectors)
+            missing = [key for key in dict.fromkeys(keys) if key not in vectors]
+            if missing:
+                found = self._disk_get(missing)
+                for key, vector in found.items():
+                    self._remember(key, vector)
+                vectors.update(found)
+                self.disk_hits += sum(1 for key in keys if key in found)
+
+        todo = {key: text for key, text in zip(keys, input) if key not in vectors}
+        if todo:
+            embedded = self.base(list(todo.values()))
+            new = {key: np.asarray(vector, dtype=np.float32) for key, vector in zip(todo, embedded)}
+            with self._lock:
+                self.misses += sum(1 for key in keys if key in new)
+                for key, vector in new.items():
+                    self._remember(key, vector)
+                self._disk_put(new)
+            vectors.update(new)
+        return [vectors[key].tolist() for key in keys]
+
+    def embed_uncached(self, texts: List[str]) -> List[List[float]]:
+        """Embed with the wrapped model, bypassing (and not filling) the cache."""
+        return [np.asarray(vector, dtype=np.float32).tolist() for vector in self.base(texts)]
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
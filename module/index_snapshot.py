@@ -0,0 +1,215 @@
+# Versioned, checksummed procedure index snapshots for fast cold start
+import argparse
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = "manifest.json"
+# 2: the lexical index is stored as JSON + numpy arrays instead of a pickled vectorizer
+SNAPSHOT_FORMAT = 2
+VERSION_MARKER = ".snapshot_version"
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot is missing, incompatible or fails its checksums."""
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _file_checksums(root: str) -> Dict[str, Dict]:
+    files = {}
+    for directory, _, names in os.walk(root):
+        for name in sorted(names):
+            path = os.path.join(directory, name)
+            rel = os.path.relpath(path, root).replace(os.sep, "/")
+            if rel != MANIFEST:
+                files[rel] = {"sha256": _sha256(path), "bytes": os.path.getsize(path)}
+    return dict(sorted(files.items()))
+
+
+def build_snapshot(out_dir: str, procedures: Optional[Iterable] = None, dtype: str = "int8",
+                   nlist: Optional[int] = None) -> Dict:
+    """
+    Embed and index a procedure catalog once and write everything serving
+    needs to `out_dir`: the Chroma collection (chroma/), the fitted lexical
+    index (lexical/) and the memory-mapped store (mmap/), plus a manifest
+    with per-file SHA-256 checksums. The snapshot version is a hash of
+    those checksums, so any change to the artifact changes the version.
+    The catalog is the assistant's sample data plus any `procedures`.
+    """
+    from module.rag_cost_recomm import HealthcareAIAssistant, HealthcareVectorDatabase
+
+    building = f"{out_dir}.building"
+    shutil.rmtree(building, ignore_errors=True)
+    os.makedirs(building)
+    started = time.perf_counter()
+
+    db = HealthcareVectorDatabase(os.path.join(building, "chroma"), retrieval_backend="hybrid",
+                                  mmap_path=os.path.join(building, "mmap"))
+    # Same catalog the service indexes at startup, plus any extra procedures
+    HealthcareAIAssistant(db).load_sample_data()
+    if procedures is not None:
+        db.add_procedures(procedures)
+    db.lexical_index.save(os.path.join(building, "lexical"))
+    db.build_mmap_store(os.path.join(building, "mmap"), dtype=dtype, nlist=nlist)
+    count = db.procedures_collection.count()
+    embedding_model = db.embedding_function.model_id
+    # Release Chroma's file handles before the directory is moved
+    del db
+
+    files = _file_checksums(building)
+    version = hashlib.sha256(json.dumps(files, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "version": version,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "procedures": count,
+        "embedding_model": embedding_model,
+        "mmap_dtype": dtype,
+        "files": files,
+    }
+    with open(os.path.join(building, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(building, out_dir)
+    logger.info(f"Built index snapshot {version} with {count} procedures "
+                f"in {time.perf_counter() - started:.1f}s at {out_dir}")
+    return manifest
+
+
+def read_manifest(path: str) -> Dict:
+    try:
+        with open(os.path.join(path, MANIFEST), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise SnapshotError(f"No readable snapshot manifest in {path}: {e}") from e
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        raise SnapshotError(f"Unsupported snapshot format {manifest.get('format')} in {path}")
+    return manifest
+
+
+def verify_snapshot(path: str) -> Dict:
+    """Check every file against the manifest; returns the manifest or raises SnapshotError."""
+    manifest = read_manifest(path)
+    for rel, expected in manifest["files"].items():
+        file_path = os.path.join(path, rel)
+        if not os.path.exists(file_path):
+            raise SnapshotError(f"Snapshot {manifest['version']} is missing {rel}")
+        if os.path.getsize(file_path) != expected["bytes"] or _sha256(file_path) != expected["sha256"]:
+            raise SnapshotError(f"Snapshot {manifest['version']} failed its checksum for {rel}")
+    return manifest
+
+
+def _installed_version(persist_directory: str) -> Optional[str]:
+    marker = os.path.join(persist_directory, VERSION_MARKER)
+    if not os.path.exists(marker):
+        return None
+    with open(marker, encoding="utf-8") as f:
+        return f.read().strip()
+
+
+def _install_chroma_copy(source: str, persist_directory: str, version: str):
+    """
+    Make `persist_directory` a copy of the snapshot's Chroma files unless it
+    already holds `version`. Workers starting together serialize on a lock
+    file, and the copy is built beside the target and renamed into place,
+    so no worker ever opens a half-copied directory.
+    """
+    if _installed_version(persist_directory) == version:
+        return
+    parent = os.path.dirname(os.path.abspath(persist_directory))
+    os.makedirs(parent, exist_ok=True)
+    with open(f"{persist_directory}.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            # Another worker may have installed it while this one waited
+            if _installed_version(persist_directory) == version:
+                return
+            building = f"{persist_directory}.building-{os.getpid()}"
+            shutil.rmtree(building, ignore_errors=True)
+            shutil.copytree(source, building)
+            with open(os.path.join(building, VERSION_MARKER), "w", encoding="utf-8") as f:
+                f.write(version)
+            if os.path.isdir(persist_directory):
+                retired = f"{persist_directory}.old-{os.getpid()}"
+                os.replace(persist_directory, retired)
+                shutil.rmtree(retired, ignore_errors=True)
+            os.replace(building, persist_directory)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def load_snapshot(path: str, persist_directory: Optional[str] = None, retrieval_backend: Optional[str] = None,
+                  verify: Optional[bool] = None, embedding_function=None):
+    """
+    Open a HealthcareVectorDatabase served from a snapshot without
+    re-embedding anything. The Chroma files are copied to a writable
+    `persist_directory` (skipped when it already holds this version); the
+    lexical index is loaded prebuilt and the mmap store is mapped in place,
+    so the snapshot itself may be a read-only mount. Raises SnapshotError
+    if the serving embedding model is not the one the snapshot was built with.
+    """
+    from module.lexical_index import LexicalIndex
+    from module.rag_cost_recomm import HealthcareVectorDatabase
+
+    if verify is None:
+        verify = os.getenv("HEALTHCARE_SNAPSHOT_VERIFY", "1") == "1"
+    manifest = verify_snapshot(path) if verify else read_manifest(path)
+    version = manifest["version"]
+    persist_directory = persist_directory or os.getenv("HEALTHCARE_SNAPSHOT_WORKDIR", "./healthcare_vectordb_snapshot")
+
+    _install_chroma_copy(os.path.join(path, "chroma"), persist_directory, version)
+
+    retrieval_backend = retrieval_backend or os.getenv("HEALTHCARE_RETRIEVAL_BACKEND", "chroma")
+    lexical_index = None
+    if retrieval_backend in ("lexical", "hybrid"):
+        lexical_index = LexicalIndex.load(os.path.join(path, "lexical"))
+    db = HealthcareVectorDatabase(persist_directory, embedding_function=embedding_function,
+                                  retrieval_backend=retrieval_backend, lexical_index=lexical_index,
+                                  mmap_path=os.path.join(path, "mmap"))
+    # Stored vectors are only comparable with queries embedded by the same model
+    serving_model = db.embedding_function.model_id
+    if manifest.get("embedding_model") != serving_model:
+        raise SnapshotError(f"Snapshot {version} was embedded with {manifest.get('embedding_model')!r}, "
+                            f"but this process embeds queries with {serving_model!r}")
+    db.snapshot_version = version
+    logger.info(f"Serving procedures from index snapshot {version} ({manifest['procedures']} procedures)")
+    return db
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or verify a procedure index snapshot")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="embed the catalog and write a snapshot")
+    build.add_argument("out_dir")
+    build.add_argument("--dtype", default="int8", choices=["int8", "float16"])
+    build.add_argument("--nlist", type=int, default=None)
+    verify = commands.add_parser("verify", help="check a snapshot's checksums")
+    verify.add_argument("path")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "build":
+        manifest = build_snapshot(args.out_dir, dtype=args.dtype, nlist=args.nlist)
+    else:
+        manifest = verify_snapshot(args.path)
+    print(f"snapshot {manifest['version']}: {manifest['procedures']} procedures, {len(manifest['files'])} files")
+
+
+if __name__ == "__main__":
+    main()
@@ -54,18 +54,73 @@ def format_insurance_card_fields(fields: dict) -> str:
 # Use relative import for cms_ingestion
 import os
 import sys
+import threading
+from functools import lru_cache
 cms_ingest_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../data_ingestion/module/cms_ingestion'))
 if cms_ingest_path not in sys.path:
     sys.path.append(cms_ingest_path)
-try:
-    from data_ingestion.module.cms_ingestion.cms_ingestion import fetch_cms_data
-except ImportError:
-    fetch_cms_data = None
+
+
+@lru_cache(maxsize=1)
+def _import_fetch_cms_data():
+    try:
+        from data_ingestion.module.cms_ingestion.cms_ingestion import fetch_cms_data
+    except ImportError:
+        return None
+    return fetch_cms_data
 
 
 # --- Provider/Doctor Recommendation Integration ---
-from module.rag_cost_recomm import HealthcareVectorDatabase
-vector_db = HealthcareVectorDatabase()
+# Heavy resources are created on first use (or by warm_up()), so importing
+# this module neither opens the vector DB nor downloads CMS data.
+_vector_db = None
+_vector_db_lock = threading.Lock()
+_cms_provider_data = None
+_cms_provider_lock = threading.Lock()
+
+
+def get_vector_db():
+    """Return the process-wide HealthcareVectorDatabase, opening it on first use."""
+    global _vector_db
+    if _vector_db is None:
+        with _vector_db_lock:
+            if _vector_db is None:
+                from module.rag_cost_recomm import HealthcareVectorDatabase
+                _vector_db = HealthcareVectorDatabase()
+    return _vector_db
+
+
+def get_cms_provider_data():
+    """
+    (DataFrame, SubstringIndex) of CMS providers, fetched and indexed on
+    first use and then cached for the process. (None, None) when CMS
+    ingestion is unavailable or the fetch failed.
+    """
+    global _cms_provider_data
+    if _cms_provider_data is None:
+        with _cms_provider_lock:
+            if _cms_provider_data is None:
+                df, index = None, None
+                fetch_cms_data = _import_fetch_cms_data()
+                if fetch_cms_data:
+                    try:
+                        df = fetch_cms_data()
+                        if df is not None:
+                            # Built once; queries then only touch rows sharing the query's words
+                            index = SubstringIndex.from_dataframe(df)
+                            # Otherwise built by the first one-word chat query
+                            index.build_infix_postings()
+                    except Exception:
+                        df, index = None, None
+                _cms_provider_data = (df, index)
+    return _cms_provider_data
+
+
+def warm_up():
+    """Create the lazily initialized resources now (called from the app lifespan when enabled)."""
+    get_vector_db()
+    get_cms_provider_data()
+
 
 def answer_from_card_fields(query: str, card_fields: dict):
     """
@@ -79,96 +134,144 @@ def answer_from_card_fields(query: str, card_fields: dict):
 # result = answer_from_card_fields(user_query, extracted_fields)
 # print(result["answer"])  # -> Your copay is 25
 
-# Cache CMS data at module load (can be improved for production)
-cms_provider_df = None
-if fetch_cms_data:
-    try:
-        cms_provider_df = fetch_cms_data()
-    except Exception as e:
-        cms_provider_df = None
+from module.text_index import SubstringIndex
 
 def search_cms_providers(query: str):
     """Search CMS provider data for a provider name or specialty."""
-    if cms_provider_df is None or len(cms_provider_df) == 0:
+    cms_provider_df, cms_provider_index = get_cms_provider_data()
+    if cms_provider_df is None or len(cms_provider_df) == 0 or cms_provider_index is None:
         return []
-    q = query.lower()
-    # Try to match provider name or specialty columns
-    results = cms_provider_df[cms_provider_df.apply(lambda row: q in str(row).lower(), axis=1)]
-    return results.to_dict(orient="records")[:5]  # Return top 5 matches
+    # Match the query against the row values (case-insensitive substring)
+    rows = cms_provider_index.search(query, limit=5)
+    return cms_provider_df.iloc[rows].to_dict(orient="records")  # Return top 5 matches
 # insurance_llm_loader.py
 
+import io
 import os
+import numpy as np
 import pandas as pd
-import requests
 from PIL import Image
-from pdf2image import convert_from_path
-import pytesseract
 
-from langchain_community.document_loaders import CSVLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.embeddings import OpenAIEmbeddings
-from langchain_community.vectorstores import Chroma
-from langchain_community.chat_models import ChatOpenAI
-from langchain.chains import RetrievalQA
+from module.insurance_data import InsuranceDataCache
+from module.openfda_client import get_openfda_client
+# langchain, pdf2image and the OCR backends are imported where they are used:
+# they dominate import time and most requests never touch them.
 
 openai_api_key = os.getenv("OPENAI_API_KEY")
 
 def load_insurance_data(path: str):
+    from langchain_community.document_loaders import CSVLoader
     df = pd.read_csv(path)
     loader = CSVLoader(file_path=path)
     docs = loader.load()
     return df, docs
 
+# Parsed datasets keyed by path+mtime+size; repeated lookups skip CSV parsing
+insurance_data_cache = InsuranceDataCache(
+    load_insurance_data,
+    max_bytes=int(os.getenv("INSURANCE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+)
+
 def chunk_documents(docs, chunk_size=300, chunk_overlap=30):
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
     splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
     return splitter.split_documents(docs)
 
 def build_vector_db(chunks):
+    from langchain_community.embeddings import OpenAIEmbeddings
+    from langchain_community.vectorstores import Chroma
     embedding = OpenAIEmbeddings()
     db = Chroma.from_documents(chunks, embedding)
     return db.as_retriever(search_kwargs={"k": 3})
 
 def setup_llm_chain(retriever):
+    from langchain_community.chat_models import ChatOpenAI
+    from langchain.chains import RetrievalQA
     llm = ChatOpenAI(temperature=0)
     return RetrievalQA.from_chain_type(llm=llm, retriever=retriever)
 
 def get_drugs_for_symptom(symptom: str):
-    url = "https://api.fda.gov/drug/drugsfda.json"
-    params = {"search": f"products.active_ingredient:{symptom}", "limit": 10}
-    try:
-        response = requests.get(url, params=params)
-        data = response.json()
-        if "results" in data:
-            return [item["products"][0]["brand_name"].lower() for item in data["results"]]
-    except:
-        pass
-    return []
-
-def extract_text_from_card(file_path: str):
+    # Shared pooled client with retries and a TTL/LRU cache on the normalized symptom
+    return get_openfda_client().get_drugs_for_symptom(symptom)
+
+def extract_text_from_card(file_path: str, dpi: int = 200, first_page: int = 1, last_page=None):
+    from insurance_analyzer.ocr_backend import image_to_string
+    from insurance_analyzer.pdf_ocr import extract_pdf_text
     if file_path.endswith(".pdf"):
-        images = convert_from_path(file_path)
-        return "\n".join([pytesseract.image_to_string(img) for img in images])
+        # Pages are rasterized lazily and OCRed in parallel worker processes
+        return extract_pdf_text(file_path, dpi=dpi, first_page=first_page, last_page=last_page)
     else:
         img = Image.open(file_path)
-        return pytesseract.image_to_string(img)
+        return image_to_string(img)
+
+def extract_text_from_card_bytes(data: bytes):
+    """
+    extract_text_from_card for an upload buffer. Images are decoded in memory;
+    a PDF is spooled to one private temporary file for the page workers and
+    removed afterwards.
+    """
+    from insurance_analyzer.ocr_backend import image_to_string
+    from insurance_analyzer.pdf_ocr import extract_pdf_text
+    if data[:5] == b"%PDF-":
+        # Same lazy, page-parallel path as extract_text_from_card
+        return extract_pdf_text(data)
+    else:
+        img = Image.open(io.BytesIO(data))
+        return image_to_string(img)
 
-def lookup_insurance(df, name_input: str):
+def lookup_insurance(df, name_input: str, index=None, fuzzy: bool = False):
+    """
+    Rows whose company or plan name contains `name_input`. With a prebuilt
+    `index` (InsuranceDataset.name_index) only matching rows are touched;
+    `fuzzy` falls back to trigram-ranked matches when nothing matches exactly.
+    """
     name_input = name_input.lower()
+    if index is not None:
+        # Names are indexed as "company\nplan", so a newline could span both columns
+        rows = [] if "\n" in name_input else index.search(name_input)
+        if not rows and fuzzy:
+            rows = index.fuzzy_search(name_input, limit=20)
+        return df.iloc[rows]
     matches = df[
-        df["COMPANY NAME"].str.lower().str.contains(name_input) |
-        df["PLAN NAME"].str.lower().str.contains(name_input)
+        df["COMPANY NAME"].str.lower().str.contains(name_input, regex=False) |
+        df["PLAN NAME"].str.lower().str.contains(name_input, regex=False)
     ]
     return matches
 
-def match_plans_by_symptom(df, drugs):
+def match_plans_by_symptom(df, drugs, index=None, match_all: bool = False):
+    """
+    Plans whose COVERAGE mentions any (or, with `match_all`, every) drug in
+    `drugs`. The result has a "MATCHED DRUGS" column listing the drugs each
+    plan matched. With a prebuilt `index` (InsuranceDataset.coverage_index)
+    the work is proportional to the matching rows instead of the table size.
+    """
+    drugs = list(dict.fromkeys(d.lower().strip() for d in drugs or [] if d and d.strip()))
     if not drugs:
         return pd.DataFrame()
-    return df[df["COVERAGE"].str.lower().str.contains('|'.join(drugs))]
+    matched = {}
+    if index is not None:
+        for drug in drugs:
+            for row in index.search(drug):
+                matched.setdefault(row, []).append(drug)
+    else:
+        coverage = df["COVERAGE"].fillna("").astype(str).str.lower()
+        for drug in drugs:
+            for row in np.flatnonzero(coverage.str.contains(drug, regex=False).to_numpy()).tolist():
+                matched.setdefault(row, []).append(drug)
+    if match_all:
+        matched = {row: found for row, found in matched.items() if len(found) == len(drugs)}
+    rows = sorted(matched)
+    result = df.iloc[rows].copy()
+    result["MATCHED DRUGS"] = [matched[row] for row in rows]
+    return result
 
 # Optional: Add a main() function for CLI or script usage
 
 # Chat handler for routing user queries
-def handle_chat_query(query: str, df=None, docs=None, card_fields=None):
+def handle_chat_query(query: str, df=None, docs=None, card_fields=None, dataset=None):
+    if dataset is not None:
+        df = dataset.df if df is None else df
+        docs = dataset.docs if docs is None else docs
 
     query_lower = query.lower()
     response = {
@@ -190,7 +293,7 @@ def handle_chat_query(query: str, df=None, docs=None, card_fields=None):
             location = match.group(1).strip()
         elif "near me" in query_lower:
             location = "my area"  # Could be replaced with user profile info
-        results = vector_db.search_procedures(query=query, location=location, n_results=5)
+        results = get_vector_db().search_procedures(query=query, location=location, n_results=5)
         if results:
             response["answer"] = f"Here are some providers near {location or 'you'}:"
             response["recommendations"] = [f"{r['provider_name']} ({r['location']}) - {r['specialty']}" for r in results]
@@ -210,7 +313,7 @@ def handle_chat_query(query: str, df=None, docs=None, card_fields=None):
         elif "near me" in query_lower:
             location = "my area"  # Could be replaced with user profile info
         # Use vector DB to search for providers
-        results = vector_db.search_procedures(query=query, location=location, n_results=5)
+        results = get_vector_db().search_procedures(query=query, location=location, n_results=5)
         if results:
             response["answer"] = f"Here are some providers near {location or 'you'}:"
             response["recommendations"] = [f"{r['provider_name']} ({r['location']}) - {r['specialty']}" for r in results]
@@ -258,7 +361,7 @@ def handle_chat_query(query: str, df=None, docs=None, card_fields=None):
         return response
 
     # --- CMS Provider Data Q&A ---
-    if ("medicare" in query_lower or "cms" in query_lower or "provider" in query_lower) and fetch_cms_data:
+    if ("medicare" in query_lower or "cms" in query_lower or "provider" in query_lower) and _import_fetch_cms_data():
         providers = search_cms_providers(query)
         if providers:
             response["answer"] = f"Found {len(providers)} Medicare providers for your query."
@@ -288,7 +391,8 @@ def handle_chat_query(query: str, df=None, docs=None, card_fields=None):
             for word in ["for ", "named ", "plan "]:
                 if word in query_lower:
                     name = query_lower.split(word)[-1].split()[0]
-                    matches = lookup_insurance(df, name)
+                    name_index = dataset.name_index if dataset is not None else None
+                    matches = lookup_insurance(df, name, index=name_index, fuzzy=True)
                     response["entities"]["plan_name"] = name
                     if not matches.empty:
                         response["coverage"] = matches.to_dict(orient="records")
@@ -308,7 +412,8 @@ def handle_chat_query(query: str, df=None, docs=None, card_fields=None):
             for word in ["for ", "of ", "drug "]:
                 if word in query_lower:
                     drug = query_lower.split(word)[-1].split()[0]
-                    plans = match_plans_by_symptom(df, [drug])
+                    coverage_index = dataset.coverage_index if dataset is not None else None
+                    plans = match_plans_by_symptom(df, [drug], index=coverage_index)
                     response["entities"]["drug"] = drug
                     if not plans.empty:
                         response["coverage"] = plans.to_dict(orient="records")
@@ -320,9 +425,9 @@ def handle_chat_query(query: str, df=None, docs=None, card_fields=None):
         return response
     # Retrieval QA (general question)
     elif docs is not None:
-        chunks = chunk_documents(docs)
-        retriever = build_vector_db(chunks)
-        qa_chain = setup_llm_chain(retriever)
+        # Retriever is cached by content hash and persisted; no corpus re-embed per question
+        from module.retriever_cache import get_retriever_cache
+        qa_chain = get_retriever_cache().get_qa_chain(docs, setup_llm_chain)
         answer = qa_chain.run(query)
         response["answer"] = answer
         return response
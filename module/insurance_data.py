@@ -0,0 +1,113 @@
+# Cached, parsed insurance plan datasets shared by the chat and LLM routers
+import os
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Callable, Dict, List, Tuple
+
+import pandas as pd
+
+from module.text_index import SubstringIndex
+
+NAME_COLUMNS = ["COMPANY NAME", "PLAN NAME"]
+
+
+@dataclass
+class InsuranceDataset:
+    """A parsed insurance CSV: the DataFrame, its LangChain docs and the cache key."""
+    path: str
+    df: pd.DataFrame
+    docs: List
+    key: Tuple[str, int, int]
+    nbytes: int = 0
+
+    @cached_property
+    def name_index(self) -> SubstringIndex:
+        """Token/trigram index over company and plan names, built on first lookup."""
+        names = self.df[NAME_COLUMNS].fillna("").astype(str)
+        return SubstringIndex.from_dataframe(names)
+
+    @cached_property
+    def coverage_index(self) -> SubstringIndex:
+        """Token index over the COVERAGE text, used to match plans to drug lists."""
+        return SubstringIndex(self.df["COVERAGE"].fillna("").astype(str).tolist())
+
+
+def _estimate_nbytes(df: pd.DataFrame, docs) -> int:
+    size = int(df.memory_usage(deep=True).sum())
+    for doc in docs or []:
+        size += sys.getsizeof(getattr(doc, "page_content", "")) + sys.getsizeof(getattr(doc, "metadata", {}))
+    return size
+
+
+class InsuranceDataCache:
+    """
+    Bounded LRU cache of parsed insurance datasets keyed by (path, mtime, size).
+    Entries are evicted least-recently-used first once their estimated memory
+    exceeds `max_bytes`; a changed file gets a new key and is re-parsed.
+    """
+
+    def __init__(self, loader: Callable[[str], Tuple[pd.DataFrame, List]],
+                 max_bytes: int = 256 * 1024 * 1024):
+        self.loader = loader
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, InsuranceDataset]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(path: str) -> Tuple[str, int, int]:
+        abspath = os.path.abspath(path)
+        st = os.stat(abspath)
+        return abspath, st.st_mtime_ns, st.st_size
+
+    def get(self, path: str) -> InsuranceDataset:
+        key = self.make_key(path)
+        abspath = key[0]
+        with self._lock:
+            entry = self._entries.get(abspath)
+            if entry is not None and entry.key == key:
+                self._entries.move_to_end(abspath)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        # Parse outside the lock so other datasets stay readable meanwhile
+        df, docs = self.loader(abspath)
+        entry = InsuranceDataset(abspath, df, docs, key, _estimate_nbytes(df, docs))
+
+        with self._lock:
+            stale = self._entries.pop(abspath, None)
+            if stale is not None:
+                self._total_bytes -= stale.nbytes
+            self._entries[abspath] = entry
+            self._total_bytes += entry.nbytes
+            # Always keep the newest entry, even if it alone exceeds the budget
+            while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._total_bytes -= evicted.nbytes
+                self.evictions += 1
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,175 @@
+# Sparse TF-IDF index over procedure documents: retrieval without an embedding model
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+# Filter clause masks kept per index (each holds one byte per record)
+MASK_CACHE_SIZE = 32
+
+
+class LexicalIndex:
+    """
+    In-process TF-IDF retrieval over the same enriched documents and metadata
+    stored in Chroma. Rows are L2-normalized, so one sparse matrix product
+    scores a whole batch of queries by cosine similarity; the product stays
+    sparse, so a query only touches records sharing a term with it. Records
+    can be added at any time; the matrix is rebuilt on the next search or
+    by an explicit rebuild().
+
+    Filters use the Chroma `where` subset produced by procedure_filter
+    ({"key": value} and {"$and": [...]}), evaluated as boolean masks; the
+    last MASK_CACHE_SIZE clause masks are cached.
+    """
+
+    def __init__(self, ngram_range: Tuple[int, int] = (1, 2), sublinear_tf: bool = True):
+        self.ngram_range = ngram_range
+        self.sublinear_tf = sublinear_tf
+        self._records: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        self._ids: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._vectorizer: Optional[TfidfVectorizer] = None
+        self._matrix = None
+        self._term_matrix = None
+        self._masks: "OrderedDict[Tuple[str, Any], np.ndarray]" = OrderedDict()
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._records)
+
+    def add(self, ids: Sequence[str], documents: Sequence[str], metadatas: Sequence[Dict[str, Any]]):
+        """Insert or replace records by id."""
+        with self._lock:
+            for record_id, document, metadata in zip(ids, documents, metadatas):
+                self._records[record_id] = (document, metadata)
+            self._dirty = True
+
+    def stored_metadata(self, ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {record_id: self._records[record_id][1] for record_id in ids if record_id in self._records}
+
+    def save(self, path: str):
+        """
+        Write the fitted index so it can be loaded without refitting: records
+        and vocabulary as JSON, IDF weights and the matrix as numpy arrays
+        (nothing is pickled, so loading never executes code from the files).
+        """
+        os.makedirs(path, exist_ok=True)
+        with self._lock:
+            if self._dirty:
+                self._rebuild()
+            with open(os.path.join(path, "records.json"), "w", encoding="utf-8") as f:
+                json.dump([[record_id, *self._records[record_id]] for record_id in self._ids], f)
+            vectorizer = {"ngram_range": list(self.ngram_range), "sublinear_tf": self.sublinear_tf,
+                          "vocabulary": None}
+            if self._vectorizer is not None:
+                vectorizer["vocabulary"] = {term: int(column) for term, column
+                                            in self._vectorizer.vocabulary_.items()}
+                np.save(os.path.join(path, "idf.npy"), self._vectorizer.idf_)
+            with open(os.path.join(path, "vectorizer.json"), "w", encoding="utf-8") as f:
+                json.dump(vectorizer, f)
+            if self._matrix is not None:
+                sparse.save_npz(os.path.join(path, "matrix.npz"), self._matrix)
+
+    @classmethod
+    def load(cls, path: str) -> "LexicalIndex":
+        """Load an index written by save()."""
+        with open(os.path.join(path, "vectorizer.json"), encoding="utf-8") as f:
+            vectorizer = json.load(f)
+        index = cls(tuple(vectorizer["ngram_range"]), vectorizer["sublinear_tf"])
+        with open(os.path.join(path, "records.json"), encoding="utf-8") as f:
+            records = json.load(f)
+        if vectorizer["vocabulary"] is not None:
+            index._vectorizer = TfidfVectorizer(ngram_range=index.ngram_range, sublinear_tf=index.sublinear_tf,
+                                                dtype=np.float32)
+            index._vectorizer.vocabulary_ = vectorizer["vocabulary"]
+            index._vectorizer.idf_ = np.load(os.path.join(path, "idf.npy"))
+        index._records = {record_id: (document, metadata) for record_id, document, metadata in records}
+        index._ids = [record[0] for record in records]
+        index._metadatas = [record[2] for record in records]
+        matrix_path = os.path.join(path, "matrix.npz")
+        if os.path.exists(matrix_path):
+            index._set_matrix(sparse.load_npz(matrix_path).tocsr())
+        return index
+
+    def _set_matrix(self, matrix):
+        self._matrix = matrix
+        # Terms x records, so a query's terms select rows of a CSR matrix directly
+        self._term_matrix = matrix.T.tocsr() if matrix is not None else None
+
+    def rebuild(self):
+        """Refit now if records were added, so the next search does not pay for it."""
+        with self._lock:
+            if self._dirty:
+                self._rebuild()
+
+    def _rebuild(self):
+        self._ids = list(self._records)
+        documents = [self._records[record_id][0] for record_id in self._ids]
+        self._metadatas = [self._records[record_id][1] for record_id in self._ids]
+        if documents:
+            self._vectorizer = TfidfVectorizer(ngram_range=self.ngram_range, sublinear_tf=self.sublinear_tf,
+                                               dtype=np.float32)
+            self._set_matrix(self._vectorizer.fit_transform(documents).tocsr())
+        else:
+            self._vectorizer = None
+            self._set_matrix(None)
+        self._masks = OrderedDict()
+        self._dirty = False
+
+    def _mask(self, where: Dict) -> np.ndarray:
+        clauses = where["$and"] if "$and" in where else [where]
+        mask = np.ones(len(self._ids), dtype=bool)
+        for clause in clauses:
+            for key, value in clause.items():
+                cached = self._masks.get((key, value))
+                if cached is None:
+                    cached = np.fromiter((metadata.get(key) == value for metadata in self._metadatas),
+                                         dtype=bool, count=len(self._metadatas))
+                    self._masks[(key, value)] = cached
+                    if len(self._masks) > MASK_CACHE_SIZE:
+                        self._masks.popitem(last=False)
+                else:
+                    self._masks.move_to_end((key, value))
+                mask &= cached
+        return mask
+
+    def search_many(self, texts: Sequence[str], n_results: int = 10,
+                    where: Optional[Dict] = None) -> List[List[Tuple[Dict[str, Any], float]]]:
+        """
+        Top `n_results` (metadata, cosine score) pairs per query text among
+        records matching `where`; records sharing no term with a query are
+        never returned.
+        """
+        with self._lock:
+            if self._dirty:
+                self._rebuild()
+            if self._matrix is None or n_results <= 0:
+                return [[] for _ in texts]
+            # Sparse (queries x records): only records sharing a term with a query are stored
+            scores = (self._vectorizer.transform(texts) @ self._term_matrix).tocsr()
+            mask = self._mask(where) if where else None
+            metadatas = self._metadatas
+
+        results = []
+        for q in range(scores.shape[0]):
+            start, end = scores.indptr[q], scores.indptr[q + 1]
+            rows, values = scores.indices[start:end], scores.data[start:end]
+            keep = values > 0
+            if mask is not None:
+                keep &= mask[rows]
+            rows, values = rows[keep], values[keep]
+            if len(rows) > n_results:
+                top = np.argpartition(-values, n_results - 1)[:n_results]
+                rows, values = rows[top], values[top]
+            # Ties keep record order, as a dense stable sort would
+            order = np.lexsort((rows, -values))
+            results.append([(metadatas[i], score) for i, score in
+                            zip(rows[order].tolist(), values[order].tolist())])
+        return results
@@ -0,0 +1,393 @@
+# Quantized, memory-mapped embedding store with columnar metadata
+import json
+import os
+import shutil
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+MANIFEST = "manifest.json"
+# 2: per-flag row postings (flags.rows*.npy)
+FORMAT_VERSION = 2
+DTYPES = ("int8", "float16")
+BLOCK_ROWS = 1 << 18
+# Rows dequantized at a time while searching (keeps the float32 scratch small)
+SEARCH_BLOCK_ROWS = 1 << 14
+
+# Per-row keys that are unique and only useful at load time
+DEFAULT_EXCLUDE = ("content_hash",)
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def quantize(vectors: np.ndarray, dtype: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Rows as `dtype` plus the per-row scale that restores them (1.0 for float16)."""
+    if dtype == "float16":
+        return vectors.astype(np.float16), np.ones(len(vectors), dtype=np.float32)
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales = np.where(scales > 0, scales, 1.0).astype(np.float32)
+    return np.round(vectors / scales[:, None]).astype(np.int8), scales
+
+
+def spherical_kmeans(sample: np.ndarray, nlist: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """Unit-norm centroids clustering `sample` (unit-norm rows) by inner product."""
+    rng = np.random.default_rng(seed)
+    centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        counts = np.bincount(assign, minlength=nlist)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        empty = counts == 0
+        sums = np.zeros_like(centroids)
+        sums[~empty] = np.add.reduceat(sample[np.argsort(assign, kind="stable")], starts[~empty], axis=0)
+        # Re-seed empty lists with random points
+        sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+        centroids = _normalize_rows(sums)
+    return centroids
+
+
+class _StringColumn:
+    """Dictionary-encoded strings: int32 codes per row, vocabulary as one UTF-8 blob + offsets."""
+
+    def __init__(self, codes: np.ndarray, blob: np.ndarray, offsets: np.ndarray):
+        self.codes = codes
+        self._blob = blob
+        self._offsets = offsets
+        self._lookup: Optional[Dict[str, int]] = None
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def value(self, code: int) -> Optional[str]:
+        if code < 0:
+            return None
+        return bytes(self._blob[self._offsets[code]:self._offsets[code + 1]]).decode("utf-8")
+
+    def code_of(self, value: str) -> int:
+        if self._lookup is None:
+            self._lookup = {self.value(code): code for code in range(len(self))}
+        return self._lookup.get(value, -2)
+
+
+def _save_vocab(path: str, name: str, vocab: List[str]):
+    encoded = [v.encode("utf-8") for v in vocab]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    np.save(os.path.join(path, f"{name}.vocab_offsets.npy"), offsets)
+    np.save(os.path.join(path, f"{name}.vocab.npy"), np.frombuffer(b"".join(encoded), dtype=np.uint8))
+
+
+class MmapStoreWriter:
+    """
+    Builds an MmapVectorStore from chunks of (ids, embeddings, metadatas), so
+    catalogs larger than RAM can be written. Rows are quantized as they
+    arrive; finalize() trains the IVF lists and rewrites rows grouped by list.
+
+    Metadata values become columns by type: strings are dictionary-encoded,
+    numbers stored as float64, and True-valued keys (the loc_*/plan_* flags of
+    procedure metadata) as per-row flag lists usable in `where` filters.
+    """
+
+    def __init__(self, path: str, dim: int, dtype: str = "int8", exclude: Sequence[str] = DEFAULT_EXCLUDE):
+        if dtype not in DTYPES:
+            raise ValueError(f"dtype must be one of {DTYPES}, got {dtype!r}")
+        self.path = path
+        self.dim = dim
+        self.dtype = dtype
+        self.exclude = set(exclude)
+        os.makedirs(path, exist_ok=True)
+        self._raw_path = os.path.join(path, "_unsorted.bin")
+        self._raw = open(self._raw_path, "wb")
+        self.count = 0
+        self._scales: List[np.ndarray] = []
+        self._ids: List[str] = []
+        self._strings: Dict[str, Dict[str, int]] = {}
+        self._string_codes: Dict[str, List[int]] = {}
+        self._numbers: Dict[str, List[float]] = {}
+        self._flag_vocab: Dict[str, int] = {}
+        self._flag_codes: List[int] = []
+        self._flag_counts: List[int] = []
+
+    def add(self, ids: Sequence[str], embeddings: np.ndarray, metadatas: Sequence[Dict[str, Any]]):
+        vectors = _normalize_rows(embeddings)
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dimensional embeddings, got {vectors.shape[1]}")
+        data, scales = quantize(vectors, self.dtype)
+        self._raw.write(data.tobytes())
+        self._scales.append(scales)
+        self._ids.extend(ids)
+        for metadata in metadatas:
+            row = self.count
+            flags = 0
+            for key, value in (metadata or {}).items():
+                if key in self.exclude:
+                    continue
+                if value is True:
+                    self._flag_codes.append(self._flag_vocab.setdefault(key, len(self._flag_vocab)))
+                    flags += 1
+                elif isinstance(value, str):
+                    vocab = self._strings.setdefault(key, {})
+                    codes = self._string_codes.setdefault(key, [])
+                    codes.extend([-1] * (row - len(codes)))
+                    codes.append(vocab.setdefault(value, len(vocab)))
+                elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                    column = self._numbers.setdefault(key, [])
+                    column.extend([float("nan")] * (row - len(column)))
+                    column.append(float(value))
+            self._flag_counts.append(flags)
+            self.count += 1
+
+    def finalize(self, nlist: Optional[int] = None, train_size: int = 100_000, seed: int = 0) -> "MmapVectorStore":
+        """Write the store; with `nlist`, rows are clustered into that many IVF lists."""
+        self._raw.close()
+        n, path = self.count, self.path
+        raw = np.memmap(self._raw_path, dtype=self.dtype, mode="r", shape=(n, self.dim)) if n else None
+        scales = np.concatenate(self._scales) if self._scales else np.zeros(0, dtype=np.float32)
+
+        order = np.arange(n, dtype=np.int64)
+        centroids = None
+        list_offsets = np.array([0, n], dtype=np.int64)
+        if nlist and n:
+            nlist = min(nlist, n)
+            rng = np.random.default_rng(seed)
+            sample_rows = np.sort(rng.choice(n, size=min(train_size, n), replace=False))
+            sample = _normalize_rows(raw[sample_rows].astype(np.float32) * scales[sample_rows, None])
+            centroids = spherical_kmeans(sample, nlist, seed=seed)
+            assign = np.empty(n, dtype=np.int32)
+            for start in range(0, n, BLOCK_ROWS):
+                block = raw[start:start + BLOCK_ROWS].astype(np.float32)
+                assign[start:start + BLOCK_ROWS] = np.argmax(block @ centroids.T, axis=1)
+            order = np.argsort(assign, kind="stable")
+            list_offsets = np.searchsorted(assign[order], np.arange(nlist + 1)).astype(np.int64)
+            np.save(os.path.join(path, "centroids.npy"), centroids.astype(np.float32))
+        np.save(os.path.join(path, "list_offsets.npy"), list_offsets)
+
+        embeddings = np.lib.format.open_memmap(os.path.join(path, "embeddings.npy"), mode="w+",
+                                               dtype=self.dtype, shape=(n, self.dim))
+        for start in range(0, n, BLOCK_ROWS):
+            embeddings[start:start + BLOCK_ROWS] = raw[order[start:start + BLOCK_ROWS]]
+        embeddings.flush()
+        del embeddings, raw
+        np.save(os.path.join(path, "scales.npy"), scales[order])
+
+        ids_vocab: Dict[str, int] = {}
+        id_codes = np.array([ids_vocab.setdefault(record_id, len(ids_vocab)) for record_id in self._ids],
+                            dtype=np.int32)
+        np.save(os.path.join(path, "ids.codes.npy"), id_codes[order])
+        _save_vocab(path, "ids", list(ids_vocab))
+        for key, vocab in self._strings.items():
+            codes = np.array(self._string_codes[key] + [-1] * (n - len(self._string_codes[key])), dtype=np.int32)
+            np.save(os.path.join(path, f"str.{key}.codes.npy"), codes[order])
+            _save_vocab(path, f"str.{key}", list(vocab))
+        for key, values in self._numbers.items():
+            column = np.array(values + [float("nan")] * (n - len(values)), dtype=np.float64)
+            np.save(os.path.join(path, f"num.{key}.npy"), column[order])
+
+        # Flag lists (CSR), regrouped in the new row order
+        counts = np.array(self._flag_counts, dtype=np.int64)
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        new_counts = counts[order]
+        new_offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(new_counts, out=new_offsets[1:])
+        gather = np.repeat(offsets[:-1][order] - new_offsets[:-1], new_counts) + np.arange(new_offsets[-1])
+        np.save(os.path.join(path, "flags.codes.npy"), np.array(self._flag_codes, dtype=np.int32)[gather])
+        np.save(os.path.join(path, "flags.offsets.npy"), new_offsets)
+        # And inverted: the sorted rows carrying each flag, so a flag filter reads only its rows
+        new_codes = np.array(self._flag_codes, dtype=np.int32)[gather]
+        by_flag = np.argsort(new_codes, kind="stable")
+        np.save(os.path.join(path, "flags.rows.npy"), np.repeat(np.arange(n, dtype=np.int64), new_counts)[by_flag])
+        np.save(os.path.join(path, "flags.rows_offsets.npy"),
+                np.searchsorted(new_codes[by_flag], np.arange(len(self._flag_vocab) + 1)).astype(np.int64))
+
+        manifest = {
+            "format_version": FORMAT_VERSION,
+            "count": n,
+            "dim": self.dim,
+            "dtype": self.dtype,
+            "nlist": 0 if centroids is None else len(centroids),
+            "string_columns": list(self._strings),
+            "number_columns": list(self._numbers),
+            "flags": list(self._flag_vocab),
+        }
+        # The manifest is written last: a store without one is incomplete
+        with open(os.path.join(path, MANIFEST + ".tmp"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(os.path.join(path, MANIFEST + ".tmp"), os.path.join(path, MANIFEST))
+        os.remove(self._raw_path)
+        return MmapVectorStore(path)
+
+
+class MmapVectorStore:
+    """
+    Read-only procedure vector store whose arrays are all memory-mapped, so
+    every worker process opening the same directory shares one copy through
+    the OS page cache. Embeddings are unit-norm rows stored as int8 (with a
+    per-row scale) or float16; scores are cosine similarities.
+
+    search() is exact (blocked brute force) by default, or IVF-approximate
+    with `nprobe` when the store was built with IVF lists.
+    """
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, MANIFEST), encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        if self.manifest["format_version"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported mmap store format {self.manifest['format_version']}")
+        self.path = path
+
+        def load(name):
+            return np.load(os.path.join(path, name), mmap_mode="r")
+
+        def string_column(name):
+            return _StringColumn(load(f"{name}.codes.npy"), load(f"{name}.vocab.npy"),
+                                 load(f"{name}.vocab_offsets.npy"))
+
+        self.embeddings = load("embeddings.npy")
+        self.scales = load("scales.npy")
+        self.list_offsets = load("list_offsets.npy")
+        self.centroids = load("centroids.npy") if self.manifest["nlist"] else None
+        self.ids = string_column("ids")
+        self.strings = {key: string_column(f"str.{key}") for key in self.manifest["string_columns"]}
+        self.numbers = {key: load(f"num.{key}.npy") for key in self.manifest["number_columns"]}
+        self.flag_vocab = {key: code for code, key in enumerate(self.manifest["flags"])}
+        self.flag_codes = load("flags.codes.npy")
+        self.flag_offsets = load("flags.offsets.npy")
+        self.flag_rows = load("flags.rows.npy")
+        self.flag_rows_offsets = load("flags.rows_offsets.npy")
+
+    @classmethod
+    def build(cls, path: str, ids: Sequence[str], embeddings: np.ndarray, metadatas: Sequence[Dict[str, Any]],
+              dtype: str = "int8", nlist: Optional[int] = None, overwrite: bool = True) -> "MmapVectorStore":
+        """Build a store from in-memory arrays (use MmapStoreWriter for chunked builds)."""
+        if overwrite and os.path.isdir(path):
+            shutil.rmtree(path)
+        writer = MmapStoreWriter(path, np.asarray(embeddings).shape[1], dtype)
+        writer.add(ids, embeddings, metadatas)
+        return writer.finalize(nlist=nlist)
+
+    def __len__(self):
+        return self.manifest["count"]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(os.path.getsize(os.path.join(self.path, name)) for name in os.listdir(self.path))
+
+    def metadata(self, row: int) -> Dict[str, Any]:
+        metadata: Dict[str, Any] = {}
+        for key, column in self.strings.items():
+            value = column.value(int(column.codes[row]))
+            if value is not None:
+                metadata[key] = value
+        for key, column in self.numbers.items():
+            if not np.isnan(column[row]):
+                metadata[key] = float(column[row])
+        for code in self.flag_codes[self.flag_offsets[row]:self.flag_offsets[row + 1]]:
+            metadata[self.manifest["flags"][code]] = True
+        return metadata
+
+    def record_id(self, row: int) -> str:
+        return self.ids.value(int(self.ids.codes[row]))
+
+    def _clause_rows(self, key: str, value: Any) -> np.ndarray:
+        if value is True and key in self.flag_vocab:
+            code = self.flag_vocab[key]
+            return np.asarray(self.flag_rows[self.flag_rows_offsets[code]:self.flag_rows_offsets[code + 1]])
+        if key in self.strings and isinstance(value, str):
+            return np.flatnonzero(np.asarray(self.strings[key].codes) == self.strings[key].code_of(value))
+        if key in self.numbers and isinstance(value, (int, float)):
+            return np.flatnonzero(np.asarray(self.numbers[key]) == value)
+        return np.zeros(0, dtype=np.int64)
+
+    def filter_rows(self, where: Optional[Dict]) -> Optional[np.ndarray]:
+        """
+        Sorted rows matching a Chroma-style where clause ({"key": value} or
+        {"$and": [...]}); None without a filter. Flags are read from their
+        memory-mapped postings and nothing is cached, so filtering adds no
+        per-process memory beyond the result.
+        """
+        if not where:
+            return None
+        clauses = where["$and"] if "$and" in where else [where]
+        rows = None
+        for clause in clauses:
+            for key, value in clause.items():
+                matched = self._clause_rows(key, value)
+                rows = matched if rows is None else np.intersect1d(rows, matched, assume_unique=True)
+        return rows
+
+    def _score_rows(self, queries: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        block = np.asarray(self.embeddings[rows], dtype=np.float32)
+        return (queries @ block.T) * np.asarray(self.scales[rows])
+
+    def _score_range(self, queries: np.ndarray, start: int, end: int) -> np.ndarray:
+        block = np.asarray(self.embeddings[start:end], dtype=np.float32)
+        return (queries @ block.T) * np.asarray(self.scales[start:end])
+
+    @staticmethod
+    def _merge_top(best_rows, best_scores, rows, scores, k):
+        rows = np.concatenate([best_rows, rows])
+        scores = np.concatenate([best_scores, scores])
+        if len(scores) > k:
+            keep = np.argpartition(-scores, k - 1)[:k]
+            rows, scores = rows[keep], scores[keep]
+        return rows, scores
+
+    def search(self, query_embeddings: np.ndarray, k: int = 10, where: Optional[Dict] = None,
+               nprobe: Optional[int] = None) -> List[List[Tuple[int, float]]]:
+        """
+        Top-k (row, cosine score) per query among rows matching `where`.
+        With `nprobe` (IVF stores only) the closest `nprobe` lists are
+        scanned, then further lists in order of closeness until k rows pass
+        the filter; otherwise every matching row is scored. A selective
+        filter always scores just its matching rows, exactly.
+        """
+        queries = _normalize_rows(np.atleast_2d(query_embeddings))
+        n = len(self)
+        if n == 0 or k <= 0:
+            return [[] for _ in queries]
+        matching = self.filter_rows(where)
+        best = [(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)) for _ in queries]
+
+        def consider(qi, start, end, scores):
+            """Merge the scores of rows start..end-1 that pass the filter."""
+            if matching is None:
+                rows = np.arange(start, end)
+            else:
+                lo, hi = np.searchsorted(matching, [start, end])
+                rows = matching[lo:hi]
+                scores = scores[rows - start]
+            best[qi] = self._merge_top(best[qi][0], best[qi][1], rows, scores, k)
+
+        if matching is not None and len(matching) < n // 8:
+            # Selective filter: score only the matching rows (cheaper than probing, and exact)
+            for start in range(0, len(matching), SEARCH_BLOCK_ROWS):
+                rows = matching[start:start + SEARCH_BLOCK_ROWS]
+                scores = self._score_rows(queries, rows)
+                for qi in range(len(queries)):
+                    best[qi] = self._merge_top(best[qi][0], best[qi][1], rows, scores[qi], k)
+        elif nprobe and self.centroids is not None:
+            probe = np.argsort(-(queries @ np.asarray(self.centroids).T), axis=1)
+            for qi, lists in enumerate(probe):
+                for probed, lst in enumerate(lists):
+                    if probed >= nprobe and len(best[qi][0]) >= k:
+                        break
+                    start, end = int(self.list_offsets[lst]), int(self.list_offsets[lst + 1])
+                    if end > start:
+                        consider(qi, start, end, self._score_range(queries[qi:qi + 1], start, end)[0])
+        else:
+            for start in range(0, n, SEARCH_BLOCK_ROWS):
+                end = min(n, start + SEARCH_BLOCK_ROWS)
+                scores = self._score_range(queries, start, end)
+                for qi in range(len(queries)):
+                    consider(qi, start, end, scores[qi])
+
+        results = []
+        for rows, scores in best:
+            order = np.argsort(-scores, kind="stable")
+            results.append([(int(rows[i]), float(scores[i])) for i in order])
+        return results
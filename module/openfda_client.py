@@ -0,0 +1,200 @@
+# Shared, pooled and cached openFDA client for drug suggestions
+import asyncio
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+def normalize_symptom(symptom: str) -> str:
+    return re.sub(r"\s+", " ", symptom or "").strip().lower()
+
+
+class TTLCache:
+    """Small LRU cache whose entries also expire after `ttl` seconds."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, count: bool = True):
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                expires, value = item
+                if expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += count
+                    return value
+                del self._data[key]
+            self.misses += count
+            return None
+
+    def set(self, key: str, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+class OpenFDAClient:
+    """
+    Async openFDA client with one pooled httpx.AsyncClient, timeouts, retries
+    with jittered exponential backoff and a TTL/LRU response cache keyed on the
+    normalized symptom. The HTTP client lives on a dedicated event loop thread
+    so sync callers (the chat path) and async endpoints share its keep-alive
+    connections; concurrent misses for the same symptom share one request.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, timeout: float = 5.0,
+                 max_connections: int = 20, retries: int = 3, backoff: float = 0.2,
+                 cache_ttl: float = 3600.0, cache_size: int = 1024):
+        self.base_url = (base_url or os.getenv("OPENFDA_BASE_URL", "https://api.fda.gov")).rstrip("/")
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.retries = retries
+        self.backoff = backoff
+        self.cache = TTLCache(cache_size, cache_ttl)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._start_lock = threading.Lock()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            with self._start_lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    self._thread = threading.Thread(target=loop.run_forever, name="openfda-client", daemon=True)
+                    self._thread.start()
+                    self._loop = loop
+        return self._loop
+
+    def _http(self) -> httpx.AsyncClient:
+        # Created lazily on the client loop, which owns its connections
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+            )
+        return self._client
+
+    async def _fetch(self, symptom: str) -> List[str]:
+        params = {"search": f"products.active_ingredient:{symptom}", "limit": 10}
+        for attempt in range(self.retries + 1):
+            try:
+                response = await self._http().get("/drug/drugsfda.json", params=params)
+            except httpx.TransportError as e:
+                if attempt >= self.retries:
+                    raise
+                reason = str(e) or type(e).__name__
+            else:
+                if response.status_code == 404:
+                    return []  # openFDA reports "no matches" as 404
+                if response.status_code not in RETRY_STATUS or attempt >= self.retries:
+                    response.raise_for_status()
+                    data = response.json()
+                    return [item["products"][0]["brand_name"].lower() for item in data.get("results", [])]
+                reason = f"HTTP {response.status_code}"
+            delay = self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+            logger.info(f"openFDA request failed ({reason}); retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+        return []
+
+    async def _lookup(self, key: str) -> List[str]:
+        """Runs on the client loop; coalesces concurrent misses for one key."""
+        cached = self.cache.get(key, count=False)
+        if cached is not None:
+            return cached
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._fetch(key))
+            self._inflight[key] = future
+            try:
+                drugs = await future
+                self.cache.set(key, drugs)
+                return drugs
+            finally:
+                del self._inflight[key]
+        return await future
+
+    async def aget_drugs_for_symptom(self, symptom: str) -> List[str]:
+        key = normalize_symptom(symptom)
+        if not key:
+            return []
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        future = asyncio.run_coroutine_threadsafe(self._lookup(key), self._ensure_loop())
+        try:
+            return await asyncio.wrap_future(future)
+        except Exception as e:
+            logger.warning(f"openFDA lookup failed for '{key}': {e}")
+            return []
+
+    def get_drugs_for_symptom(self, symptom: str) -> List[str]:
+        """Blocking variant for synchronous callers; never call it on the client loop."""
+        key = normalize_symptom(symptom)
+        if not key:
+            return []
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        future = asyncio.run_coroutine_threadsafe(self._lookup(key), self._ensure_loop())
+        try:
+            return future.result(timeout=self.timeout * (self.retries + 1) + 5)
+        except Exception as e:
+            logger.warning(f"openFDA lookup failed for '{key}': {e}")
+            return []
+
+    def close(self):
+        if self._loop is None:
+            return
+        if self._client is not None:
+            asyncio.run_coroutine_threadsafe(self._client.aclose(), self._loop).result(timeout=5)
+            self._client = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._loop.close()
+        self._loop = None
+        self._thread = None
+
+
+_client: Optional[OpenFDAClient] = None
+_client_lock = threading.Lock()
+
+
+def get_openfda_client() -> OpenFDAClient:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = OpenFDAClient()
+    return _client
+
+
+def close_openfda_client():
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
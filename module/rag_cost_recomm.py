@@ -15,22 +15,100 @@ This module implements the three core components:
 """
 import numpy as np
 import pandas as pd
-from typing import List, Dict, Any, Tuple, Optional
+from typing import List, Dict, Any, Iterable, Tuple, Optional, Union
 import chromadb
 from chromadb.config import Settings
+from chromadb.utils import embedding_functions
 import sqlite3
 from dataclasses import dataclass
 from datetime import datetime
 import json
 import logging
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import hashlib
+import os
+import shutil
+import threading
+import time
+from itertools import islice
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
 import re
+from module.embedding_cache import CachingEmbeddingFunction
+from module.lexical_index import LexicalIndex
+from module.mmap_store import MANIFEST, MmapStoreWriter, MmapVectorStore
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Rows per upsert when bulk-loading procedures
+PROCEDURE_BATCH_SIZE = int(os.getenv("PROCEDURE_BATCH_SIZE", "1000"))
+
+# "chroma": embedding search in Chroma; "lexical": in-process TF-IDF (no embedding model);
+# "hybrid": both, fused with reciprocal rank fusion; "mmap": quantized memory-mapped store
+# exported from Chroma (see build_mmap_store), shared by worker processes via the page cache
+RETRIEVAL_BACKENDS = ("chroma", "lexical", "hybrid", "mmap")
+
+# IVF lists scanned per query by the mmap backend (0 = exact search)
+MMAP_NPROBE = int(os.getenv("HEALTHCARE_MMAP_NPROBE", "16"))
+
+# Hybrid search: RRF constant, per-retriever latency budgets and candidates fetched per retriever
+RRF_K = 60
+HYBRID_VECTOR_BUDGET_MS = float(os.getenv("HYBRID_VECTOR_BUDGET_MS", "500"))
+HYBRID_LEXICAL_BUDGET_MS = float(os.getenv("HYBRID_LEXICAL_BUDGET_MS", "100"))
+HYBRID_MIN_CANDIDATES = 20
+# Retrievers that overrun their budget keep their thread until they finish, so leave headroom
+HYBRID_RETRIEVAL_WORKERS = int(os.getenv("HYBRID_RETRIEVAL_WORKERS", "16"))
+
+_retrieval_pool: Optional[ThreadPoolExecutor] = None
+_retrieval_pool_lock = threading.Lock()
+
+def _get_retrieval_pool() -> ThreadPoolExecutor:
+    global _retrieval_pool
+    if _retrieval_pool is None:
+        with _retrieval_pool_lock:
+            if _retrieval_pool is None:
+                _retrieval_pool = ThreadPoolExecutor(max_workers=HYBRID_RETRIEVAL_WORKERS,
+                                                     thread_name_prefix="hybrid-retrieval")
+    return _retrieval_pool
+
+def normalize_key(value: str) -> str:
+    """Lowercase slug used in filterable metadata keys ("Houston, TX" -> "houston_tx")"""
+    return re.sub(r"[^a-z0-9]+", "_", str(value).lower()).strip("_")
+
+def location_keys(location: str) -> List[str]:
+    """Keys a location can be filtered by: the whole location and each comma-separated part"""
+    keys = [normalize_key(location)] + [normalize_key(part) for part in str(location).split(",")]
+    return [key for key in dict.fromkeys(keys) if key]
+
+def procedure_id(metadata: Dict[str, Any]) -> str:
+    return f"proc_{metadata['cpt_code']}_{metadata['provider_id']}"
+
+def reciprocal_rank_fusion(rankings: List[List[Tuple[Dict[str, Any], float]]],
+                           k: int = RRF_K) -> List[Tuple[Dict[str, Any], float, float]]:
+    """
+    Fuse ranked (metadata, relevance) lists: each procedure scores the sum of
+    1 / (k + rank) over the lists it appears in. Returns (metadata, best
+    relevance, fused score) sorted by fused score.
+    """
+    fused: Dict[str, List] = {}
+    for ranking in rankings:
+        for rank, (metadata, relevance) in enumerate(ranking, start=1):
+            entry = fused.setdefault(procedure_id(metadata), [metadata, 0.0, 0.0])
+            entry[1] = max(entry[1], relevance)
+            entry[2] += 1.0 / (k + rank)
+    return sorted((tuple(entry) for entry in fused.values()), key=lambda entry: -entry[2])
+
+def procedure_filter(location: Optional[str] = None, insurance_plan: Optional[str] = None) -> Optional[Dict]:
+    """Chroma `where` clause for the location / insurance plan flags written by add_procedures"""
+    clauses = []
+    if location and normalize_key(location):
+        clauses.append({f"loc_{normalize_key(location)}": True})
+    if insurance_plan and normalize_key(insurance_plan):
+        clauses.append({f"plan_{normalize_key(insurance_plan)}": True})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
 @dataclass
 class HealthcareProcedure:
     """Data class for healthcare procedures"""
@@ -70,151 +148,458 @@ class HealthcareVectorDatabase:
     Stores and retrieves healthcare procedures, providers, and costs
     """
 
-    def __init__(self, persist_directory: str = "./healthcare_vectordb"):
+    def __init__(self, persist_directory: str = "./healthcare_vectordb",
+                 embedding_function: Optional[CachingEmbeddingFunction] = None,
+                 retrieval_backend: Optional[str] = None,
+                 lexical_index: Optional[LexicalIndex] = None,
+                 mmap_path: Optional[str] = None):
         """Initialize the vector database"""
+        self.retrieval_backend = retrieval_backend or os.getenv("HEALTHCARE_RETRIEVAL_BACKEND", "chroma")
+        if self.retrieval_backend not in RETRIEVAL_BACKENDS:
+            raise ValueError(f"Unknown retrieval backend {self.retrieval_backend!r}, "
+                             f"expected one of {RETRIEVAL_BACKENDS}")
         self.client = chromadb.PersistentClient(path=persist_directory)
+        # Repeated query phrasings are embedded once (memory LRU, optional SQLite tier)
+        self.embedding_function = embedding_function or CachingEmbeddingFunction(
+            embedding_functions.DefaultEmbeddingFunction(),
+            max_entries=int(os.getenv("EMBEDDING_CACHE_SIZE", "4096")),
+            persist_path=os.getenv("EMBEDDING_CACHE_PATH") or None,
+        )
         self.procedures_collection = self.client.get_or_create_collection(
             name="healthcare_procedures",
-            metadata={"description": "Healthcare procedures and costs"}
+            metadata={"description": "Healthcare procedures and costs"},
+            embedding_function=self.embedding_function
         )
         self.providers_collection = self.client.get_or_create_collection(
             name="healthcare_providers",
             metadata={"description": "Healthcare providers and networks"}
         )
-        logger.info("Vector database initialized")
-
-    def add_procedures(self, procedures: List[HealthcareProcedure]):
-        """Add healthcare procedures to the vector database"""
-        documents = []
-        metadatas = []
-        ids = []
-
-        for i, proc in enumerate(procedures):
-            # Create searchable text combining procedure details - ENHANCED FOR BETTER MATCHING
-            base_text = f"{proc.procedure_name} {proc.cpt_code} {proc.specialty}"
-
-            # Add specific keywords for better matching
-            keywords = []
-            proc_name_lower = proc.procedure_name.lower()
-
-            if "mri" in proc_name_lower or "imaging" in proc.provider_name.lower():
-                keywords.extend(["MRI", "brain scan", "imaging", "radiology", "scan", "magnetic resonance"])
-            elif "arthroscopy" in proc_name_lower or "knee" in proc_name_lower:
-                keywords.extend(["knee surgery", "arthroscopy", "orthopedic", "joint surgery", "knee operation"])
-            elif "visit" in proc_name_lower or "evaluation" in proc_name_lower:
-                keywords.extend(["checkup", "visit", "consultation", "examination", "routine checkup", "physical"])
-            elif "panel" in proc_name_lower or "lab" in proc.provider_name.lower():
-                keywords.extend(["blood work", "laboratory", "lab tests", "blood tests", "lab panel", "blood draw"])
-            elif "wellness" in proc_name_lower:
-                keywords.extend(["wellness", "annual", "physical", "checkup", "preventive", "routine"])
-            elif "dental" in proc.specialty.lower():
-                keywords.extend(["dental", "teeth", "oral", "dentist"])
-
-            # Combine base text with keywords
-            doc_text = f"{base_text} {' '.join(keywords)}"
-            documents.append(doc_text)
-
-            # Store metadata for retrieval
-            metadata = {
-                "cpt_code": proc.cpt_code,
-                "procedure_name": proc.procedure_name,
-                "base_cost": proc.base_cost,
-                "provider_id": proc.provider_id,
-                "provider_name": proc.provider_name,
-                "location": proc.location,
-                "specialty": proc.specialty,
-                "insurance_accepted": json.dumps(proc.insurance_accepted),
-                "quality_rating": proc.quality_rating
-            }
-            metadatas.append(metadata)
-            ids.append(f"proc_{proc.cpt_code}_{proc.provider_id}")
-
-        # Add procedures to vector database
-        self.procedures_collection.add(
-            documents=documents,
-            metadatas=metadatas,
-            ids=ids
+        self.lexical_index: Optional[LexicalIndex] = None
+        self.hybrid_skipped = {"vector": 0, "lexical": 0}
+        self._hybrid_skipped_lock = threading.Lock()
+        # The lexical backend keeps its records here rather than in Chroma
+        self.lexical_path = os.path.join(persist_directory, "procedures_lexical")
+        if self.retrieval_backend in ("lexical", "hybrid"):
+            # A prebuilt index (e.g. from an index snapshot) is used as-is
+            self.lexical_index = lexical_index
+            if self.lexical_index is None:
+                self._load_lexical_index()
+        self.mmap_path = (mmap_path or os.getenv("HEALTHCARE_MMAP_STORE")
+                          or os.path.join(persist_directory, "procedures_mmap"))
+        self.mmap_store: Optional[MmapVectorStore] = None
+        if self.retrieval_backend == "mmap":
+            if os.path.exists(self._mmap_stale_marker):
+                logger.warning(f"Mmap store at {self.mmap_path} predates later procedure loads; "
+                               f"searching Chroma until build_mmap_store() runs")
+            elif os.path.exists(os.path.join(self.mmap_path, MANIFEST)):
+                self.mmap_store = MmapVectorStore(self.mmap_path)
+            else:
+                logger.warning(f"No mmap store at {self.mmap_path}; searching Chroma until build_mmap_store() runs")
+        logger.info(f"Vector database initialized ({self.retrieval_backend} retrieval)")
+
+    @property
+    def uses_chroma(self) -> bool:
+        return self.retrieval_backend != "lexical"
+
+    @property
+    def _mmap_stale_marker(self) -> str:
+        # Beside the store rather than in it: the store directory is swapped whole on rebuild
+        return f"{self.mmap_path}.stale"
+
+    def _mark_mmap_stale(self):
+        """Stop serving the exported store once Chroma holds records it lacks (here and on restart)"""
+        try:
+            open(self._mmap_stale_marker, "w").close()
+        except OSError as e:
+            logger.warning(f"Could not mark the mmap store stale for other processes: {e}")
+        if self.mmap_store is not None:
+            self.mmap_store = None
+            logger.warning(f"Procedures changed since the mmap store was exported; "
+                           f"searching Chroma until build_mmap_store() runs")
+
+    def _load_lexical_index(self, page_size: int = 10000):
+        """
+        Open the lexical index saved by the lexical backend, or else seed it
+        with procedures already persisted in Chroma (reads need no model)
+        """
+        if not self.uses_chroma and os.path.isdir(self.lexical_path):
+            self.lexical_index = LexicalIndex.load(self.lexical_path)
+            logger.info(f"Loaded {len(self.lexical_index)} persisted procedures into the lexical index")
+            return
+        self.lexical_index = LexicalIndex()
+        offset = 0
+        while True:
+            page = self.procedures_collection.get(limit=page_size, offset=offset,
+                                                  include=["documents", "metadatas"])
+            if not page["ids"]:
+                break
+            self.lexical_index.add(page["ids"], page["documents"], page["metadatas"])
+            offset += len(page["ids"])
+        # Fit now rather than under the index lock in the first search
+        self.lexical_index.rebuild()
+        if offset:
+            logger.info(f"Loaded {offset} persisted procedures into the lexical index")
+
+    def _save_lexical_index(self):
+        """Write the lexical index beside the old copy and swap it in, as build_mmap_store does"""
+        building = f"{self.lexical_path}.building"
+        shutil.rmtree(building, ignore_errors=True)
+        self.lexical_index.save(building)
+        if os.path.isdir(self.lexical_path):
+            retired = f"{self.lexical_path}.old"
+            shutil.rmtree(retired, ignore_errors=True)
+            os.replace(self.lexical_path, retired)
+            shutil.rmtree(retired, ignore_errors=True)
+        os.replace(building, self.lexical_path)
+
+    def build_mmap_store(self, path: Optional[str] = None, dtype: str = "int8",
+                         nlist: Optional[int] = None, page_size: int = 10000) -> MmapVectorStore:
+        """
+        Export the procedures collection (stored embeddings and metadata) to a
+        memory-mapped store at `path`. The store is built beside the old one
+        and swapped in, so workers mapping the old files keep a valid copy.
+        `nlist` defaults to ~4*sqrt(rows) IVF lists above 50k rows, else exact only.
+        """
+        path = path or self.mmap_path
+        count = self.procedures_collection.count()
+        if nlist is None and count > 50_000:
+            nlist = int(4 * np.sqrt(count))
+        building = f"{path}.building"
+        shutil.rmtree(building, ignore_errors=True)
+        writer = None
+        offset = 0
+        while True:
+            page = self.procedures_collection.get(limit=page_size, offset=offset,
+                                                  include=["embeddings", "metadatas"])
+            if not page["ids"]:
+                break
+            embeddings = np.asarray(page["embeddings"], dtype=np.float32)
+            if writer is None:
+                writer = MmapStoreWriter(building, embeddings.shape[1], dtype)
+            writer.add(page["ids"], embeddings, page["metadatas"])
+            offset += len(page["ids"])
+        if writer is None:
+            raise ValueError("The procedures collection is empty; nothing to export")
+        writer.finalize(nlist=nlist)
+
+        if os.path.isdir(path):
+            retired = f"{path}.old"
+            shutil.rmtree(retired, ignore_errors=True)
+            os.replace(path, retired)
+            shutil.rmtree(retired, ignore_errors=True)
+        os.replace(building, path)
+        store = MmapVectorStore(path)
+        if path == self.mmap_path:
+            if os.path.exists(self._mmap_stale_marker):
+                os.remove(self._mmap_stale_marker)
+            if self.retrieval_backend == "mmap":
+                self.mmap_store = store
+        logger.info(f"Exported {len(store)} procedures to mmap store {path} ({store.nbytes / 2**20:.0f} MB)")
+        return store
+
+    @staticmethod
+    def _procedure_document(proc: HealthcareProcedure) -> str:
+        """Searchable text for a procedure: name, CPT code, specialty plus matching keywords"""
+        # Create searchable text combining procedure details - ENHANCED FOR BETTER MATCHING
+        base_text = f"{proc.procedure_name} {proc.cpt_code} {proc.specialty}"
+
+        # Add specific keywords for better matching
+        keywords = []
+        proc_name_lower = proc.procedure_name.lower()
+
+        if "mri" in proc_name_lower or "imaging" in proc.provider_name.lower():
+            keywords.extend(["MRI", "brain scan", "imaging", "radiology", "scan", "magnetic resonance"])
+        elif "arthroscopy" in proc_name_lower or "knee" in proc_name_lower:
+            keywords.extend(["knee surgery", "arthroscopy", "orthopedic", "joint surgery", "knee operation"])
+        elif "visit" in proc_name_lower or "evaluation" in proc_name_lower:
+            keywords.extend(["checkup", "visit", "consultation", "examination", "routine checkup", "physical"])
+        elif "panel" in proc_name_lower or "lab" in proc.provider_name.lower():
+            keywords.extend(["blood work", "laboratory", "lab tests", "blood tests", "lab panel", "blood draw"])
+        elif "wellness" in proc_name_lower:
+            keywords.extend(["wellness", "annual", "physical", "checkup", "preventive", "routine"])
+        elif "dental" in proc.specialty.lower():
+            keywords.extend(["dental", "teeth", "oral", "dentist"])
+
+        # Combine base text with keywords
+        return f"{base_text} {' '.join(keywords)}"
+
+    @staticmethod
+    def _procedure_metadata(proc: HealthcareProcedure) -> Dict[str, Any]:
+        """
+        Metadata stored alongside the document for retrieval. Besides the raw
+        fields, every location key and accepted plan becomes a boolean flag
+        (loc_houston_tx, loc_houston, loc_tx, plan_aetna, ...) so searches
+        can filter with Chroma `where` clauses (see procedure_filter).
+        """
+        parts = [part.strip() for part in str(proc.location).split(",")]
+        metadata = {
+            "cpt_code": proc.cpt_code,
+            "procedure_name": proc.procedure_name,
+            "base_cost": proc.base_cost,
+            "provider_id": proc.provider_id,
+            "provider_name": proc.provider_name,
+            "location": proc.location,
+            "location_city": normalize_key(parts[0]),
+            "location_state": normalize_key(parts[-1]) if len(parts) > 1 else "",
+            "specialty": proc.specialty,
+            "insurance_accepted": json.dumps(proc.insurance_accepted),
+            "quality_rating": proc.quality_rating
+        }
+        for key in location_keys(proc.location):
+            metadata[f"loc_{key}"] = True
+        for plan in proc.insurance_accepted:
+            if normalize_key(plan):
+                metadata[f"plan_{normalize_key(plan)}"] = True
+        return metadata
+
+    def _max_batch_size(self, batch_size: int) -> int:
+        # Chroma rejects writes larger than its backend's limit (newer clients expose it)
+        get_limit = getattr(self.client, "get_max_batch_size", None)
+        return min(batch_size, get_limit()) if get_limit else batch_size
+
+    def add_procedures(self, procedures: Iterable[HealthcareProcedure],
+                       batch_size: int = PROCEDURE_BATCH_SIZE) -> Dict[str, float]:
+        """
+        Idempotently bulk-load healthcare procedures into the vector database.
+
+        Procedures are consumed lazily and upserted `batch_size` at a time under
+        the id proc_{cpt}_{provider}, so reloading a catalog never fails on
+        duplicate ids. Each record stores a content hash of its document and
+        metadata; records whose hash is unchanged are skipped without being
+        re-embedded, which makes re-running a load nearly free.
+        Returns load statistics (records seen, upserted, unchanged, repeated ids, throughput).
+
+        With the lexical backend, records go to the TF-IDF index only, so
+        loading never runs the embedding model; the index is saved under the
+        persist directory after any load that changed it.
+        """
+        batch_size = self._max_batch_size(batch_size)
+        stats = {"total": 0, "upserted": 0, "unchanged": 0, "duplicates": 0, "batches": 0}
+        started = time.perf_counter()
+        iterator = iter(procedures)
+
+        while True:
+            chunk = list(islice(iterator, batch_size))
+            if not chunk:
+                break
+            stats["total"] += len(chunk)
+
+            # Later rows win when a batch repeats an id, as they would with one upsert per row
+            batch: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+            for proc in chunk:
+                document = self._procedure_document(proc)
+                metadata = self._procedure_metadata(proc)
+                metadata["content_hash"] = hashlib.sha256(
+                    json.dumps([document, metadata], sort_keys=True).encode("utf-8")
+                ).hexdigest()
+                batch[f"proc_{proc.cpt_code}_{proc.provider_id}"] = (document, metadata)
+
+            if self.uses_chroma:
+                existing = self.procedures_collection.get(ids=list(batch), include=["metadatas"])
+                stored = dict(zip(existing["ids"], existing["metadatas"]))
+            else:
+                stored = self.lexical_index.stored_metadata(list(batch))
+            stored_hashes = {record_id: (metadata or {}).get("content_hash")
+                             for record_id, metadata in stored.items()}
+            changed = [record_id for record_id, (_, metadata) in batch.items()
+                       if stored_hashes.get(record_id) != metadata["content_hash"]]
+            stats["duplicates"] += len(chunk) - len(batch)
+            stats["unchanged"] += len(batch) - len(changed)
+
+            if changed and self.lexical_index is not None:
+                self.lexical_index.add(changed, [batch[record_id][0] for record_id in changed],
+                                       [batch[record_id][1] for record_id in changed])
+            if changed and self.uses_chroma:
+                documents = [batch[record_id][0] for record_id in changed]
+                self.procedures_collection.upsert(
+                    ids=changed,
+                    documents=documents,
+                    # Embed documents directly so a catalog load does not flush the query cache
+                    embeddings=self.embedding_function.embed_uncached(documents),
+                    metadatas=[batch[record_id][1] for record_id in changed]
+                )
+            stats["upserted"] += len(changed)
+            stats["batches"] += 1
+
+            if stats["batches"] % 10 == 0:
+                elapsed = time.perf_counter() - started
+                logger.info(f"Loaded {stats['total']} procedures ({stats['total'] / elapsed:.0f} rows/s)")
+
+        if stats["upserted"] and self.retrieval_backend == "mmap":
+            self._mark_mmap_stale()
+        if stats["upserted"] and self.lexical_index is not None:
+            self.lexical_index.rebuild()
+            if not self.uses_chroma:
+                self._save_lexical_index()
+
+        elapsed = time.perf_counter() - started
+        stats["seconds"] = elapsed
+        stats["rows_per_sec"] = stats["total"] / elapsed if elapsed > 0 else 0.0
+        logger.info(
+            f"Procedure load: {stats['total']} rows, {stats['upserted']} upserted, "
+            f"{stats['unchanged']} unchanged in {elapsed:.2f}s ({stats['rows_per_sec']:.0f} rows/s)"
         )
+        return stats
 
-        # Debug: Print what we're adding
-        for i, (doc, meta) in enumerate(zip(documents[:3], metadatas[:3])):
-            logger.info(f"Added procedure {i}: {doc} -> {meta['procedure_name']}")
-
-        logger.info(f"Added {len(procedures)} procedures to vector database")
-
-    def search_procedures(self, query: str, location: Optional[str] = None,
-                         insurance_plan: Optional[str] = None, n_results: int = 10) -> List[Dict]:
-        """Search for procedures using natural language query"""
-        # Enhance query with location and insurance if provided
-        enhanced_query = query
-        if location:
-            enhanced_query += f" {location}"
-
-        # Search in vector database
+    def _chroma_search(self, texts: List[str], n_results: int,
+                       where: Optional[Dict]) -> List[List[Tuple[Dict[str, Any], float]]]:
+        """(metadata, relevance) lists from one Chroma query() call"""
         results = self.procedures_collection.query(
-            query_texts=[enhanced_query],
+            query_texts=texts,
             n_results=n_results,
-            include=["metadatas", "documents", "distances"]
+            where=where,
+            include=["metadatas", "distances"]
         )
-
-        # Debug: Print search results
-        logger.info(f"Search query: '{enhanced_query}'")
-        logger.info(f"Found {len(results['ids'][0])} results")
-
-        # Process and filter results
-        processed_results = []
-        # Check if results and required subfields are not None
-        if (
-            results is not None and
-            results.get('ids') is not None and
-            results.get('metadatas') is not None and
-            results.get('distances') is not None and
-            results['ids'] and results['metadatas'] and results['distances']
-        ):
-            for i in range(len(results['ids'][0])):
-                metadata = results['metadatas'][0][i]
-                distance = results['distances'][0][i]
-
-                logger.info(f"Result {i}: {metadata['procedure_name']} (distance: {distance:.3f})")
-
-                # Filter by insurance if specified
-                if insurance_plan:
-                    insurance_accepted_value = metadata['insurance_accepted']
-                    if not isinstance(insurance_accepted_value, str):
-                        insurance_accepted_value = str(insurance_accepted_value)
-                    accepted_plans = json.loads(insurance_accepted_value)
-                    if insurance_plan not in accepted_plans:
-                        continue
-
-                # Filter by location if specified
-                if location:
-                    provider_location = metadata.get('location', '')
-                    if not isinstance(provider_location, str):
-                        provider_location = str(provider_location)
-                    if location.lower() not in provider_location.lower():
-                        continue
-
-                # Calculate proper relevance score (distance to similarity conversion)
-                distance = results['distances'][0][i]
-                # Convert distance to similarity: closer distance = higher similarity
-                # Typical ChromaDB distances range from 0 to 2, so we normalize
-                relevance = max(0, 1 - (distance / 2.0))  # Normalize to 0-1 range
-
-                processed_results.append({
-                    'cpt_code': metadata['cpt_code'],
-                    'procedure_name': metadata['procedure_name'],
-                    'base_cost': float(metadata['base_cost']) if metadata['base_cost'] is not None else 0.0,
-                    'provider_id': metadata['provider_id'],
-                    'provider_name': metadata['provider_name'],
-                    'location': metadata['location'],
-                    'specialty': metadata['specialty'],
-                    'quality_rating': float(metadata['quality_rating']) if metadata['quality_rating'] is not None else 0.0,
-                    'relevance_score': relevance
-                })
-        else:
+        if not results or not results.get('ids') or not results.get('metadatas') or not results.get('distances'):
             logger.warning("No results returned from vector database or results are None.")
+            return [[] for _ in texts]
+        hits = []
+        for metadatas, distances in zip(results['metadatas'], results['distances']):
+            # Convert distance to similarity: closer distance = higher similarity
+            # Typical ChromaDB distances range from 0 to 2, so we normalize to 0-1
+            relevance = np.maximum(0.0, 1.0 - np.asarray(distances, dtype=float) / 2.0)
+            hits.append(list(zip(metadatas, relevance.tolist())))
+        return hits
+
+    def _mmap_search(self, texts: List[str], n_results: int,
+                     where: Optional[Dict]) -> List[List[Tuple[Dict[str, Any], float]]]:
+        """(metadata, relevance) lists from the memory-mapped store; cosine is the 0-1 relevance"""
+        query_embeddings = np.asarray(self.embedding_function(texts), dtype=np.float32)
+        hits = self.mmap_store.search(query_embeddings, n_results, where, nprobe=MMAP_NPROBE or None)
+        return [[(self.mmap_store.metadata(row), max(0.0, score)) for row, score in row_hits]
+                for row_hits in hits]
+
+    def _hybrid_search(self, texts: List[str], n_results: int,
+                       where: Optional[Dict]) -> List[List[Tuple[Dict[str, Any], float, float]]]:
+        """
+        Run the Chroma and lexical retrievers side by side and fuse their
+        rankings with RRF. A retriever that misses its latency budget (or
+        fails) is left out of the fusion rather than delaying the answer.
+        Budgets run from when a retriever starts, so time spent queued for a
+        pool thread is not charged to it (a retriever still queued after its
+        budget counts as late). If every retriever is late, the first one to
+        finish is used rather than returning nothing.
+        """
+        candidates = max(n_results * 2, HYBRID_MIN_CANDIDATES)
+        pool = _get_retrieval_pool()
+        started = {"vector": threading.Event(), "lexical": threading.Event()}
+        start_times: Dict[str, float] = {}
+
+        def run(name, fn, *args):
+            start_times[name] = time.perf_counter()
+            started[name].set()
+            return fn(*args)
+
+        retrievers = {
+            "vector": (pool.submit(run, "vector", self._chroma_search, texts, candidates, where),
+                       HYBRID_VECTOR_BUDGET_MS),
+            "lexical": (pool.submit(run, "lexical", self.lexical_index.search_many, texts, candidates, where),
+                        HYBRID_LEXICAL_BUDGET_MS),
+        }
+        rankings = []
+        late = []
+        for name, (future, budget_ms) in retrievers.items():
+            budget = budget_ms / 1000.0
+            try:
+                if not started[name].wait(budget):
+                    raise FutureTimeoutError()
+                remaining = start_times[name] + budget - time.perf_counter()
+                rankings.append(future.result(timeout=max(0.0, remaining)))
+            except FutureTimeoutError:
+                late.append(future)
+                self._count_hybrid_skip(name)
+                logger.warning(f"Hybrid search: {name} retriever exceeded its {budget_ms:.0f} ms budget")
+            except Exception as e:
+                self._count_hybrid_skip(name)
+                logger.warning(f"Hybrid search: {name} retriever failed: {e}")
+        pending = set(late) if not rankings else set()
+        while pending and not rankings:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            rankings.extend(future.result() for future in done if future.exception() is None)
+        return [reciprocal_rank_fusion([ranking[row] for ranking in rankings])[:n_results]
+                for row in range(len(texts))]
+
+    def _count_hybrid_skip(self, name: str):
+        with self._hybrid_skipped_lock:
+            self.hybrid_skipped[name] += 1
+
+    @staticmethod
+    def _procedure_result(metadata: Dict[str, Any], relevance: float) -> Dict:
+        return {
+            'cpt_code': metadata['cpt_code'],
+            'procedure_name': metadata['procedure_name'],
+            'base_cost': float(metadata['base_cost']) if metadata['base_cost'] is not None else 0.0,
+            'provider_id': metadata['provider_id'],
+            'provider_name': metadata['provider_name'],
+            'location': metadata['location'],
+            'specialty': metadata['specialty'],
+            'quality_rating': float(metadata['quality_rating']) if metadata['quality_rating'] is not None else 0.0,
+            'relevance_score': relevance
+        }
 
-        return processed_results
+    def search_procedures(self, query: str, location: Optional[str] = None,
+                         insurance_plan: Optional[str] = None, n_results: int = 10) -> List[Dict]:
+        """
+        Search for procedures using natural language query. Location and
+        insurance filters run inside Chroma, so up to `n_results` matching
+        procedures come back however selective the filters are. Locations
+        match a whole location or one comma-separated part of it ("Houston",
+        "TX" or "Houston, TX"); plan names match case-insensitively.
+        """
+        return self.search_procedures_many([query], location, insurance_plan, n_results)[0]
+
+    def search_procedures_many(self, queries: List[str],
+                               locations: Union[None, str, List[Optional[str]]] = None,
+                               insurance_plans: Union[None, str, List[Optional[str]]] = None,
+                               n_results: int = 10) -> List[List[Dict]]:
+        """
+        Run many searches with as few Chroma calls as possible. `locations` and
+        `insurance_plans` are either one value for every query or a list with
+        one entry per query. Queries sharing the same filters are embedded and
+        searched in a single query() call; returns one result list per query,
+        in input order, with the same results search_procedures gives.
+        """
+        def per_query(value, name):
+            if value is None or isinstance(value, str):
+                return [value] * len(queries)
+            if len(value) != len(queries):
+                raise ValueError(f"{name} must have one entry per query")
+            return list(value)
+
+        locations = per_query(locations, "locations")
+        insurance_plans = per_query(insurance_plans, "insurance_plans")
+
+        # One Chroma call per distinct filter (a where clause applies to the whole call)
+        groups: Dict[str, List[int]] = {}
+        filters: Dict[str, Optional[Dict]] = {}
+        for i, (location, plan) in enumerate(zip(locations, insurance_plans)):
+            where = procedure_filter(location, plan)
+            group_key = json.dumps(where, sort_keys=True)
+            groups.setdefault(group_key, []).append(i)
+            filters[group_key] = where
+
+        all_results: List[List[Dict]] = [[] for _ in queries]
+        for group_key, indices in groups.items():
+            # Enhance query with location if provided
+            texts = [f"{queries[i]} {locations[i]}" if locations[i] else queries[i] for i in indices]
+            if self.retrieval_backend == "hybrid":
+                # Ordered by fused rank; relevance_score stays the best 0-1 retriever score
+                for i, hits in zip(indices, self._hybrid_search(texts, n_results, filters[group_key])):
+                    all_results[i] = [{**self._procedure_result(metadata, relevance), 'rrf_score': fused}
+                                      for metadata, relevance, fused in hits]
+                continue
+            if self.retrieval_backend == "lexical":
+                # TF-IDF cosine scores are already in the 0-1 relevance range
+                hits_per_query = self.lexical_index.search_many(texts, n_results, filters[group_key])
+            elif self.mmap_store is not None:
+                hits_per_query = self._mmap_search(texts, n_results, filters[group_key])
+            else:
+                hits_per_query = self._chroma_search(texts, n_results, filters[group_key])
+            for i, hits in zip(indices, hits_per_query):
+                all_results[i] = [self._procedure_result(metadata, relevance) for metadata, relevance in hits]
+
+        logger.info(f"Searched {len(queries)} queries with {len(groups)} {self.retrieval_backend} calls")
+        return all_results
 
 class CostComparisonEngine:
     """
@@ -423,8 +808,8 @@ class HealthcareAIAssistant:
         "Content-Type": "application/json"
     }
 
-    def __init__(self):
-        self.vector_db = HealthcareVectorDatabase()
+    def __init__(self, vector_db: Optional[HealthcareVectorDatabase] = None):
+        self.vector_db = vector_db or HealthcareVectorDatabase()
         self.cost_engine = CostComparisonEngine(self.vector_db)
         self.recommendation_engine = RecommendationEngine(self.cost_engine)
         self.sample_data_loaded = False
@@ -494,11 +879,11 @@ class HealthcareAIAssistant:
                 query, patient, top_n=5
             )
             try:
-                from data_ingestion.module.cms_ingestion.cms_ingestion import ingest_pipeline
-                cms_chunks = ingest_pipeline()
-                cms_recs = [chunk for chunk in cms_chunks if query.lower() in chunk.get('text', '').lower()]
+                # Read the cached snapshot; refreshes happen in the background
+                from data_ingestion.module.cms_ingestion.chunk_store import get_cms_chunk_store
+                cms_recs = get_cms_chunk_store().search(query)
             except Exception as cms_e:
-                logger.warning(f"CMS ingestion failed: {cms_e}")
+                logger.warning(f"CMS chunk store unavailable: {cms_e}")
                 cms_recs = []
             all_recommendations = recommendations.copy()
             if cms_recs:
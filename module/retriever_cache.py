@@ -0,0 +1,139 @@
+# Persistent cache of insurance retrievers for the RetrievalQA chat path
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_community.vectorstores import Chroma
+
+logger = logging.getLogger(__name__)
+
+_READY_MARKER = "READY"
+
+
+def _default_embedding():
+    from langchain_community.embeddings import OpenAIEmbeddings
+    return OpenAIEmbeddings()
+
+
+def _embedding_id(embedding) -> str:
+    model = getattr(embedding, "model", None) or getattr(embedding, "model_name", None)
+    return f"{type(embedding).__name__}:{model or ''}"
+
+
+class RetrieverCache:
+    """
+    Caches Chroma retrievers keyed by a content hash of the documents, the
+    chunking parameters and the embedding model. Built indexes are persisted
+    under `persist_root`, so after the first build (or a restart) a question
+    only costs one query embedding instead of re-embedding the corpus.
+    At most `max_entries` retrievers and chains are kept open (LRU); evicted
+    ones are reopened from disk on demand. Builds run under a per-key lock,
+    so embedding a new corpus never blocks questions about cached ones.
+    """
+
+    def __init__(self, persist_root: str = "./insurance_retriever_cache",
+                 embedding_factory: Callable = _default_embedding, k: int = 3,
+                 max_entries: int = 8):
+        self.persist_root = persist_root
+        self.embedding_factory = embedding_factory
+        self.k = k
+        self.max_entries = max_entries
+        self._embedding = None
+        self._retrievers: "OrderedDict[str, object]" = OrderedDict()
+        self._chains: "OrderedDict[str, object]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._build_locks: Dict[str, threading.Lock] = {}
+
+    @property
+    def embedding(self):
+        if self._embedding is None:
+            self._embedding = self.embedding_factory()
+        return self._embedding
+
+    def cache_key(self, docs, chunk_size: int, chunk_overlap: int) -> str:
+        h = hashlib.sha256()
+        h.update(json.dumps([chunk_size, chunk_overlap, self.k, _embedding_id(self.embedding)]).encode())
+        for doc in docs:
+            h.update(doc.page_content.encode("utf-8"))
+            h.update(json.dumps(doc.metadata, sort_keys=True, default=str).encode("utf-8"))
+        return h.hexdigest()
+
+    def _build(self, key: str, docs, chunk_size: int, chunk_overlap: int):
+        directory = os.path.join(self.persist_root, key[:32])
+        collection_name = f"insurance_{key[:16]}"
+        if os.path.exists(os.path.join(directory, _READY_MARKER)):
+            logger.info(f"Opening persisted retriever index {directory}")
+            db = Chroma(collection_name=collection_name, persist_directory=directory,
+                        embedding_function=self.embedding)
+        else:
+            # A build that died before writing the marker left a partial collection behind
+            shutil.rmtree(directory, ignore_errors=True)
+            splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+            chunks = splitter.split_documents(docs)
+            logger.info(f"Embedding {len(chunks)} chunks into {directory}")
+            db = Chroma.from_documents(chunks, self.embedding, collection_name=collection_name,
+                                       persist_directory=directory)
+            with open(os.path.join(directory, _READY_MARKER), "w") as f:
+                f.write(key)
+        return db.as_retriever(search_kwargs={"k": self.k})
+
+    def _remember(self, entries: "OrderedDict[str, object]", key: str, value):
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+    def _recall(self, entries: "OrderedDict[str, object]", key: str):
+        with self._lock:
+            value = entries.get(key)
+            if value is not None:
+                entries.move_to_end(key)
+            return value
+
+    def get_retriever(self, docs, chunk_size: int = 300, chunk_overlap: int = 30,
+                      key: Optional[str] = None):
+        """`key` is cache_key(docs, chunk_size, chunk_overlap) when the caller already has it."""
+        key = key or self.cache_key(docs, chunk_size, chunk_overlap)
+        retriever = self._recall(self._retrievers, key)
+        if retriever is None:
+            with self._lock:
+                build_lock = self._build_locks.setdefault(key, threading.Lock())
+            with build_lock:
+                # Another thread may have built it while this one waited
+                retriever = self._recall(self._retrievers, key)
+                if retriever is None:
+                    retriever = self._build(key, docs, chunk_size, chunk_overlap)
+                    with self._lock:
+                        self._remember(self._retrievers, key, retriever)
+            with self._lock:
+                self._build_locks.pop(key, None)
+        return retriever
+
+    def get_qa_chain(self, docs, chain_factory: Callable, chunk_size: int = 300,
+                     chunk_overlap: int = 30):
+        """Return a cached QA chain built by `chain_factory(retriever)`."""
+        # The corpus is hashed once per question and the key shared with get_retriever
+        key = self.cache_key(docs, chunk_size, chunk_overlap)
+        chain = self._recall(self._chains, key)
+        if chain is None:
+            chain = chain_factory(self.get_retriever(docs, chunk_size, chunk_overlap, key=key))
+            with self._lock:
+                self._remember(self._chains, key, chain)
+        return chain
+
+
+_cache: Optional[RetrieverCache] = None
+
+
+def get_retriever_cache() -> RetrieverCache:
+    global _cache
+    if _cache is None:
+        _cache = RetrieverCache(os.getenv("INSURANCE_RETRIEVER_CACHE_DIR", "./insurance_retriever_cache"),
+                                max_entries=int(os.getenv("INSURANCE_RETRIEVER_CACHE_SIZE", "8")))
+    return _cache
@@ -0,0 +1,326 @@
+# Inverted token index answering case-insensitive substring queries over text rows
+import bisect
+import re
+from array import array
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# Minimum trigram (Jaccard) similarity for a vocabulary term to count as a
+# fuzzy match of a query word.
+FUZZY_THRESHOLD = 0.4
+
+# Fragment expansions matching more vocabulary terms than this are skipped as
+# filters (the final substring check still applies), keeping unions small.
+MAX_EXPANSION_TERMS = 256
+
+# Infix fragments are looked up through postings of every vocabulary
+# trigram, then confirmed against the candidate terms.
+INFIX_GRAM = 3
+
+# With a result limit, broad candidate sets are produced this many rows at a
+# time (doubling), so a common word does not materialize its whole union.
+CANDIDATE_WINDOW_ROWS = 1 << 14
+
+
+class SubstringIndex:
+    """
+    Answers `query.lower() in text.lower()` for every row without scanning
+    all rows. Each word of the query narrows the candidate rows through the
+    token postings: interior words must appear as whole tokens, while the
+    first/last words may be the tail/head of a longer token. Candidates are
+    then confirmed with a plain substring check, so results are exactly those
+    of a full scan, returned in row order.
+    """
+
+    def __init__(self, texts: Iterable[str]):
+        self.texts: List[str] = [str(t).lower() for t in texts]
+        postings: Dict[str, array] = {}
+        for row, text in enumerate(self.texts):
+            for tok in set(_TOKEN_RE.findall(text)):
+                rows = postings.get(tok)
+                if rows is None:
+                    rows = postings[tok] = array("i")
+                rows.append(row)
+        self._postings = {tok: np.frombuffer(rows, dtype=np.int32) for tok, rows in postings.items()}
+        self._vocab = sorted(self._postings)
+        self._rvocab = sorted(tok[::-1] for tok in self._postings)
+        self._expand = lru_cache(maxsize=4096)(self._expand_uncached)
+        self._gram_postings = None
+        self._infix_postings = None
+        self._infix_shorter: Dict[str, List[str]] = {}
+        self._infix_short_terms: List[str] = []
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, columns: Optional[List[str]] = None,
+                       sep: str = "\n") -> "SubstringIndex":
+        """Index each row as its column values joined by `sep`."""
+        columns = list(columns if columns is not None else df.columns)
+        if not columns:
+            return cls([""] * len(df))
+        text = df[columns[0]].astype(str)
+        for col in columns[1:]:
+            text = text + sep + df[col].astype(str)
+        return cls(text.tolist())
+
+    def __len__(self):
+        return len(self.texts)
+
+    def _expand_uncached(self, frag: str, left_open: bool, right_open: bool) -> tuple:
+        """
+        Vocabulary terms a query word can be part of, given open ends. At most
+        MAX_EXPANSION_TERMS + 1 are returned: a longer expansion is too broad
+        to filter on, and which terms it holds no longer matters.
+        """
+        cap = MAX_EXPANSION_TERMS + 1
+        if not left_open and not right_open:
+            return (frag,) if frag in self._postings else ()
+        if right_open and not left_open:
+            lo = bisect.bisect_left(self._vocab, frag)
+            hi = bisect.bisect_left(self._vocab, frag + "\U0010ffff")
+            return tuple(self._vocab[lo:min(hi, lo + cap)])
+        if left_open and not right_open:
+            rfrag = frag[::-1]
+            lo = bisect.bisect_left(self._rvocab, rfrag)
+            hi = bisect.bisect_left(self._rvocab, rfrag + "\U0010ffff")
+            return tuple(t[::-1] for t in self._rvocab[lo:min(hi, lo + cap)])
+        return self._infix_terms(frag)
+
+    def build_infix_postings(self):
+        """
+        Index the vocabulary's trigrams for infix lookups (query words open at
+        both ends). Otherwise built by the first such query; call it where the
+        index is created to keep that cost out of the request path.
+        """
+        if self._infix_postings is not None:
+            return
+        vocab = self._vocab
+        lengths = np.fromiter(map(len, vocab), dtype=np.int32, count=len(vocab))
+        keys, owners = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.int64)]
+        # Terms of one length form a (terms x length) code point matrix; each trigram
+        # is packed into an int64 (code points fit in 21 bits)
+        for length in np.unique(lengths[lengths >= INFIX_GRAM]).tolist():
+            term_ids = np.flatnonzero(lengths == length)
+            codes = np.array([vocab[i] for i in term_ids.tolist()], dtype=f"U{length}")
+            codes = codes.view(np.uint32).reshape(len(term_ids), length).astype(np.int64)
+            for i in range(length - INFIX_GRAM + 1):
+                keys.append(codes[:, i] << 42 | codes[:, i + 1] << 21 | codes[:, i + 2])
+                owners.append(term_ids)
+        # Plain sorts rather than np.unique, whose hashing is several times slower here
+        keys, owners = np.concatenate(keys), np.concatenate(owners)
+        order = np.argsort(keys)
+        keys = keys[order]
+        first = np.ones(len(keys), dtype=bool)
+        first[1:] = keys[1:] != keys[:-1]
+        grams = keys[first]
+        pairs = np.sort((np.cumsum(first) - 1) << 32 | owners[order])
+        # One (trigram, term) pair per term even when the term repeats the trigram
+        first = np.ones(len(pairs), dtype=bool)
+        first[1:] = pairs[1:] != pairs[:-1]
+        pairs = pairs[first]
+        pair_terms = (pairs & 0xFFFFFFFF).astype(np.int32)
+        bounds = np.searchsorted(pairs >> 32, np.arange(len(grams) + 1))
+        postings = {}
+        shorter: Dict[str, List[str]] = {}
+        mask = (1 << 21) - 1
+        for g, key in enumerate(grams.tolist()):
+            gram = chr(key >> 42) + chr(key >> 21 & mask) + chr(key & mask)
+            postings[gram] = pair_terms[bounds[g]:bounds[g + 1]]
+            for sub in _infix_grams(gram):
+                if len(sub) < INFIX_GRAM:
+                    shorter.setdefault(sub, []).append(gram)
+        self._infix_shorter = shorter
+        self._infix_short_terms = [term for term, length in zip(vocab, lengths.tolist()) if length < INFIX_GRAM]
+        self._infix_postings = postings
+
+    def _infix_terms(self, frag: str) -> tuple:
+        """Vocabulary terms containing `frag` anywhere, without scanning the vocabulary."""
+        self.build_infix_postings()
+        cap = MAX_EXPANSION_TERMS + 1
+        vocab = self._vocab
+        if len(frag) < INFIX_GRAM:
+            # Terms holding a short fragment: those of every trigram holding it, plus short terms
+            short = [term for term in self._infix_short_terms if frag in term]
+            lists = [self._infix_postings[g] for g in self._infix_shorter.get(frag, ())]
+            if not lists:
+                return tuple(short)
+            largest = max(lists, key=len)
+            if len(largest) >= cap:
+                return tuple(vocab[i] for i in largest[:cap].tolist())
+            return tuple(short + [vocab[i] for i in np.unique(np.concatenate(lists))[:cap].tolist()])
+        grams = {frag[i:i + INFIX_GRAM] for i in range(len(frag) - INFIX_GRAM + 1)}
+        lists = [self._infix_postings.get(g) for g in grams]
+        if any(ids is None for ids in lists):
+            return ()
+        lists.sort(key=len)
+        term_ids = lists[0]
+        for other in lists[1:]:
+            if len(term_ids) == 0:
+                break
+            term_ids = _intersect_sorted(term_ids, other)
+        # Every term holding the fragment holds all its trigrams; the converse needs checking
+        terms = []
+        for i in term_ids.tolist():
+            if frag in vocab[i]:
+                terms.append(vocab[i])
+                if len(terms) >= cap:
+                    break
+        return tuple(terms)
+
+    def _constraints(self, q: str) -> Optional[List[List[np.ndarray]]]:
+        """
+        For each word of `q` that narrows the search, the postings of the
+        terms it can be part of (a row must be in one of them); None when no
+        word narrows it.
+        """
+        constraints = []
+        for m in _TOKEN_RE.finditer(q):
+            terms = self._expand(m.group(), m.start() == 0, m.end() == len(q))
+            if not terms:
+                return [[]]
+            if len(terms) <= MAX_EXPANSION_TERMS:
+                constraints.append([self._postings[t] for t in terms])
+        return constraints or None
+
+    @staticmethod
+    def _matching_rows(constraints: List[List[np.ndarray]], lo: int = 0,
+                       hi: Optional[int] = None) -> np.ndarray:
+        """Sorted rows in [lo, hi) satisfying every constraint."""
+        sets = []
+        for postings in constraints:
+            if hi is not None:
+                postings = [p[np.searchsorted(p, lo):np.searchsorted(p, hi)] for p in postings]
+            if len(postings) == 1:
+                sets.append(postings[0])
+            elif postings:
+                sets.append(np.unique(np.concatenate(postings)))
+            else:
+                sets.append(np.empty(0, dtype=np.int32))
+        sets.sort(key=len)
+        rows = sets[0]
+        for other in sets[1:]:
+            if len(rows) == 0:
+                break
+            rows = _intersect_sorted(rows, other)
+        return rows
+
+    def _candidate_windows(self, q: str, limit: Optional[int]) -> Iterator[Iterable[int]]:
+        """
+        Candidate rows in row order. When only the first `limit` matches are
+        wanted and every word is common, they come in growing windows of rows
+        so the search can stop before the whole union is built.
+        """
+        constraints = self._constraints(q)
+        n = len(self.texts)
+        if constraints is None:
+            yield range(n)
+            return
+        smallest = min(sum(len(p) for p in postings) for postings in constraints)
+        if limit is None or smallest <= CANDIDATE_WINDOW_ROWS:
+            yield self._matching_rows(constraints).tolist()
+            return
+        lo, size = 0, CANDIDATE_WINDOW_ROWS
+        while lo < n:
+            hi = min(n, lo + size)
+            yield self._matching_rows(constraints, lo, hi).tolist()
+            lo, size = hi, size * 2
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[int]:
+        """Row positions whose text contains `query`, in row order."""
+        q = query.lower()
+        texts = self.texts
+        results = []
+        for rows in self._candidate_windows(q, limit):
+            for row in rows:
+                if q in texts[row]:
+                    results.append(row)
+                    if limit is not None and len(results) >= limit:
+                        return results
+        return results
+
+    def _build_gram_postings(self):
+        grams: Dict[str, array] = {}
+        sizes = np.empty(len(self._vocab), dtype=np.int32)
+        for term_id, term in enumerate(self._vocab):
+            term_grams = _trigrams(term)
+            sizes[term_id] = len(term_grams)
+            for gram in term_grams:
+                ids = grams.get(gram)
+                if ids is None:
+                    ids = grams[gram] = array("i")
+                ids.append(term_id)
+        self._gram_postings = {g: np.frombuffer(ids, dtype=np.int32) for g, ids in grams.items()}
+        self._gram_sizes = sizes
+
+    def _similar_terms(self, word: str, threshold: float):
+        """(term ids, similarities) of vocabulary terms close to `word`."""
+        word_grams = _trigrams(word)
+        hits = [self._gram_postings[g] for g in word_grams if g in self._gram_postings]
+        if not hits:
+            return np.empty(0, dtype=np.int32), np.empty(0)
+        term_ids, shared = np.unique(np.concatenate(hits), return_counts=True)
+        sim = shared / (len(word_grams) + self._gram_sizes[term_ids] - shared)
+        keep = sim >= threshold
+        return term_ids[keep], sim[keep]
+
+    def fuzzy_search(self, query: str, limit: Optional[int] = None,
+                     threshold: float = FUZZY_THRESHOLD) -> List[int]:
+        """
+        Row positions ranked by how well their tokens match the query words
+        under trigram similarity, to absorb OCR typos ("bluecros", "aetma").
+        A row scores the sum, over query words, of its best matching token.
+        """
+        words = _TOKEN_RE.findall(query.lower())
+        if not words or not self.texts:
+            return []
+        if self._gram_postings is None:
+            self._build_gram_postings()
+        # Scores are kept for rows holding a similar term only, never for every row
+        word_rows, word_scores = [], []
+        for word in words:
+            term_ids, sims = self._similar_terms(word, threshold)
+            postings = [self._postings[self._vocab[term_id]] for term_id in term_ids.tolist()]
+            if postings:
+                rows, best = _reduce_by_row(np.concatenate(postings),
+                                            np.repeat(sims, [len(p) for p in postings]), np.maximum)
+                word_rows.append(rows)
+                word_scores.append(best)
+        if not word_rows:
+            return []
+        rows, scores = _reduce_by_row(np.concatenate(word_rows), np.concatenate(word_scores), np.add)
+        # Stable sort keeps row order among equal scores
+        rows = rows[np.argsort(-scores, kind="stable")]
+        if limit is not None:
+            rows = rows[:limit]
+        return rows.tolist()
+
+
+def _reduce_by_row(rows: np.ndarray, values: np.ndarray, reduce: np.ufunc):
+    """Distinct rows in order, each with `reduce` applied over its values (in their given order)."""
+    order = np.argsort(rows, kind="stable")
+    rows, values = rows[order], values[order]
+    first = np.ones(len(rows), dtype=bool)
+    first[1:] = rows[1:] != rows[:-1]
+    starts = np.flatnonzero(first)
+    return rows[starts], reduce.reduceat(values, starts)
+
+
+def _intersect_sorted(small: np.ndarray, large: np.ndarray) -> np.ndarray:
+    """Values in both sorted unique arrays; binary search when one is much smaller."""
+    if len(small) * 16 < len(large):
+        pos = np.minimum(np.searchsorted(large, small), len(large) - 1)
+        return small[large[pos] == small]
+    return np.intersect1d(small, large, assume_unique=True)
+
+
+def _infix_grams(term: str) -> set:
+    return {term[i:i + n] for n in range(1, INFIX_GRAM + 1) for i in range(len(term) - n + 1)}
+
+
+def _trigrams(word: str) -> set:
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
@@ -0,0 +1,101 @@
+import json
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from data_ingestion.module.cms_ingestion.chunk_store import CMSChunkStore
+
+
+class StubCMS:
+    """Local stand-in for the CMS API: serves queued (status, body) responses."""
+
+    def __init__(self):
+        self.responses = []
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests += 1
+                status, body = stub.responses.pop(0) if len(stub.responses) > 1 else stub.responses[0]
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/data"
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def load(self):
+        # Same shape as ingest_pipeline(): one chunk dict per provider row
+        with urllib.request.urlopen(self.url, timeout=5) as response:
+            rows = json.load(response)
+        return [{"id": str(i), "text": f"{r['name']} {r['specialty']} {r['city']}"} for i, r in enumerate(rows)]
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+ROWS = [
+    {"name": "Nguyen", "specialty": "Cardiology", "city": "Houston"},
+    {"name": "Patel", "specialty": "Pediatrics", "city": "Austin"},
+    {"name": "Garcia", "specialty": "Cardiology", "city": "Dallas"},
+]
+
+
+@pytest.fixture
+def stub():
+    server = StubCMS()
+    yield server
+    server.close()
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_refresh_swaps_snapshot_and_searches(stub):
+    stub.responses = [(200, ROWS)]
+    store = CMSChunkStore(loader=stub.load, ttl_seconds=3600)
+    assert store.refresh()
+    assert [c["id"] for c in store.search("cardiology")] == ["0", "2"]
+    assert [c["id"] for c in store.search("CARDIOLOGY", limit=1)] == ["0"]
+    assert store.search("pediatrics houston") == []
+
+
+def test_failed_or_empty_refresh_keeps_previous_snapshot(stub):
+    stub.responses = [(200, ROWS), (500, {"error": "down"}), (200, [])]
+    store = CMSChunkStore(loader=stub.load, ttl_seconds=3600)
+    assert store.refresh()
+    snapshot = store.snapshot
+    assert not store.refresh()  # HTTP 500
+    assert not store.refresh()  # empty payload
+    assert store.snapshot is snapshot
+    assert len(store.search("houston")) == 1
+
+
+def test_failed_first_load_is_retried_before_the_ttl(stub):
+    stub.responses = [(503, {"error": "down"}), (200, []), (200, ROWS)]
+    store = CMSChunkStore(loader=stub.load, ttl_seconds=3600, retry_seconds=0.05)
+    store.start()
+    try:
+        assert wait_for(lambda: len(store.snapshot.chunks) == 3)
+        assert stub.requests == 3
+        assert store.search("austin")[0]["id"] == "1"
+    finally:
+        store.stop(timeout=5)
@@ -0,0 +1,125 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from module.openfda_client import OpenFDAClient
+
+
+class StubOpenFDA:
+    """Local stand-in for api.fda.gov's /drug/drugsfda.json endpoint."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.failures = {}  # symptom -> statuses to return before succeeding
+        self.requests = []
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                symptom = parse_qs(url.query)["search"][0].split(":", 1)[1]
+                with stub._lock:
+                    stub.requests.append(symptom)
+                    pending = stub.failures.get(symptom)
+                    status = pending.pop(0) if pending else 200
+                time.sleep(stub.delay)
+                if url.path != "/drug/drugsfda.json":
+                    status, body = 404, {"error": {"code": "NOT_FOUND"}}
+                elif symptom == "nothing":
+                    status, body = 404, {"error": {"code": "NOT_FOUND"}}
+                elif status != 200:
+                    body = {"error": {"code": "SERVER_ERROR"}}
+                else:
+                    body = {"results": [{"products": [{"brand_name": f"{symptom.upper()}-EASE"}]},
+                                        {"products": [{"brand_name": "Generic"}]}]}
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    server = StubOpenFDA()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def client(stub):
+    fda = OpenFDAClient(base_url=stub.base_url, timeout=2.0, retries=2, backoff=0.01)
+    yield fda
+    fda.close()
+
+
+def test_lookup_parses_brand_names(client, stub):
+    assert client.get_drugs_for_symptom("headache") == ["headache-ease", "generic"]
+    assert stub.requests == ["headache"]
+
+
+def test_no_match_is_an_empty_list(client, stub):
+    assert client.get_drugs_for_symptom("nothing") == []
+    assert stub.requests == ["nothing"]  # 404 is an answer, not a retry
+
+
+def test_retries_transient_errors(client, stub):
+    stub.failures["fever"] = [503, 429]
+    assert client.get_drugs_for_symptom("fever") == ["fever-ease", "generic"]
+    assert stub.requests == ["fever"] * 3
+
+
+def test_gives_up_after_retries(client, stub):
+    stub.failures["cough"] = [500, 500, 500]
+    assert client.get_drugs_for_symptom("cough") == []
+    assert stub.requests == ["cough"] * 3
+    # A failed lookup is not cached
+    assert client.get_drugs_for_symptom("cough") == ["cough-ease", "generic"]
+
+
+def test_cache_hits_skip_the_network(client, stub):
+    assert client.get_drugs_for_symptom("Nausea") == ["nausea-ease", "generic"]
+    assert client.get_drugs_for_symptom("  nausea ") == ["nausea-ease", "generic"]
+    assert asyncio.run(client.aget_drugs_for_symptom("NAUSEA")) == ["nausea-ease", "generic"]
+    assert stub.requests == ["nausea"]
+    assert client.cache.hits == 2
+
+
+def test_concurrent_misses_share_one_request(client, stub):
+    stub.delay = 0.2
+    results = []
+
+    def lookup():
+        results.append(client.get_drugs_for_symptom("rash"))
+
+    threads = [threading.Thread(target=lookup) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    async def gather():
+        return await asyncio.gather(*(client.aget_drugs_for_symptom("itch") for _ in range(8)))
+
+    async_results = asyncio.run(gather())
+    assert results == [["rash-ease", "generic"]] * 8
+    assert async_results == [["itch-ease", "generic"]] * 8
+    assert sorted(stub.requests) == ["itch", "rash"]